@@ -38,15 +38,81 @@ if os.getenv("DISABLE_SSL_VERIFY", "false").lower() == "true":
     logger.warning("⚠️ SSL verification disabled - only use in development!")
 
 
+# Session event handlers for debugging voice input
+def _on_user_speech_committed(msg: str):
+    logger.info("✅ User speech committed: '%s'", msg)
+
+
+def _on_agent_speech_committed(msg: str):
+    logger.info("🤖 Agent speech committed: '%s'", msg)
+
+
+def _on_user_started_speaking():
+    logger.info("🎤 User started speaking")
+
+
+def _on_user_stopped_speaking():
+    logger.info("🔇 User stopped speaking")
+
+
+def _on_function_calls_collected(function_calls):
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info("🔧 Function calls collected: %s", [call.function_info.name for call in function_calls])
+
+
+def _on_function_calls_finished(called_functions):
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info("✅ Function calls finished: %s", [func.function_info.name for func in called_functions])
+
+
+# Room event handlers for debugging
+def _on_track_published(publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
+    logger.info("📡 Track published: %s from %s", publication.kind, participant.identity)
+
+
+def _on_track_subscribed(track: rtc.Track, publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
+    logger.info("📥 Track subscribed: %s from %s", track.kind, participant.identity)
+    if track.kind == rtc.TrackKind.KIND_AUDIO:
+        logger.info("🎵 Audio track subscribed - voice input should work now")
+
+
+def _on_participant_connected(participant: rtc.RemoteParticipant):
+    logger.info("👤 Participant connected: %s", participant.identity)
+
+
+def _on_participant_disconnected(participant: rtc.RemoteParticipant):
+    logger.info("👋 Participant disconnected: %s", participant.identity)
+
+
+def _on_data_received(data_packet: rtc.DataPacket):
+    logger.info("📨 Data received from %s: %s bytes", data_packet.participant.identity if data_packet.participant else 'unknown', len(data_packet.data))
+
+
 def prewarm(proc: JobProcess):
     # Load VAD with more sensitive settings for better voice detection
-    proc.userdata["vad"] = silero.VAD.load(
+    vad = silero.VAD.load(
         # Shorter min speech duration to catch quick words (in seconds)
         min_speech_duration=0.05,
         # Shorter min silence duration to be more responsive (in seconds)
         min_silence_duration=0.3
     )
 
+    # Run one inference on silence so ONNX Runtime finishes its lazy setup
+    # here rather than on the user's first utterance. This reaches into plugin
+    # internals, so a failure only costs the warmup, never the worker.
+    try:
+        import numpy as np
+        from livekit.plugins.silero import onnx_model
+
+        warmup_model = onnx_model.OnnxModel(onnx_session=vad._onnx_session, sample_rate=16000)
+        warmup_model(np.zeros(warmup_model.window_size_samples, dtype=np.float32))
+    except Exception as e:
+        logger.warning("Skipping VAD warmup: %s", e)
+
+    proc.userdata["vad"] = vad
+
 
 async def entrypoint(ctx: JobContext):
     import asyncio
@@ -64,7 +130,7 @@ async def entrypoint(ctx: JobContext):
         return murf.TTS(
             voice=current_voice["voice"],
             style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+            tokenizer=tokenize.blingfire.SentenceTokenizer(min_sentence_len=2),
             text_pacing=True
         )
 
@@ -108,7 +174,7 @@ async def entrypoint(ctx: JobContext):
 
     async def log_usage():
         summary = usage_collector.get_summary()
-        logger.info(f"Usage: {summary}")
+        logger.info("Usage: %s", summary)
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -119,7 +185,7 @@ async def entrypoint(ctx: JobContext):
     
     # First, try to extract agent type from room name (most reliable method)
     room_name = ctx.room.name
-    logger.info(f"🎯 Room name: '{room_name}'")
+    logger.info("🎯 Room name: '%s'", room_name)
     
     if room_name.startswith("voice_assistant_"):
         # Extract agent type from room name
@@ -130,7 +196,7 @@ async def entrypoint(ctx: JobContext):
             valid_agent_types = ["food", "fraud", "wellness", "tutor", "sdr", "gm", "commerce", "improv"]
             if potential_agent_type in valid_agent_types:
                 agent_type = potential_agent_type
-                logger.info(f"🎯 ✅ Extracted agent type from room name: '{agent_type}'")
+                logger.info("🎯 ✅ Extracted agent type from room name: '%s'", agent_type)
     
     # Fallback: Try room metadata (with retries)
     if not agent_type:
@@ -139,34 +205,34 @@ async def entrypoint(ctx: JobContext):
         retry_count = 0
         
         while retry_count < max_retries:
-            logger.info(f"🎯 [Attempt {retry_count + 1}] Room metadata: '{ctx.room.metadata}'")
+            logger.info("🎯 [Attempt %s] Room metadata: '%s'", retry_count + 1, ctx.room.metadata)
             
             if ctx.room.metadata and ctx.room.metadata.strip():
                 agent_type = ctx.room.metadata.strip()
-                logger.info(f"🎯 ✅ Found metadata: '{agent_type}'")
+                logger.info("🎯 ✅ Found metadata: '%s'", agent_type)
                 break
             
             retry_count += 1
             if retry_count < max_retries:
-                logger.info(f"🎯 ⏳ Metadata not available yet, waiting 200ms...")
+                logger.info("🎯 ⏳ Metadata not available yet, waiting 200ms...")
                 await asyncio.sleep(0.2)
     
     # Final fallback: default to food
     if not agent_type:
         agent_type = "food"
-        logger.warning(f"🎯 ⚠️ No agent type found in room name or metadata, defaulting to 'food'")
+        logger.warning("🎯 ⚠️ No agent type found in room name or metadata, defaulting to 'food'")
     
     # Log what we extracted
-    logger.info(f"🎯 Extracted agent_type before validation: '{agent_type}'")
+    logger.info("🎯 Extracted agent_type before validation: '%s'", agent_type)
     
     # Additional validation
     valid_agent_types = ["food", "fraud", "wellness", "tutor", "sdr", "gm", "commerce", "improv"]
     if agent_type not in valid_agent_types:
-        logger.warning(f"⚠️ Invalid agent type '{agent_type}', defaulting to 'food'")
+        logger.warning("⚠️ Invalid agent type '%s', defaulting to 'food'", agent_type)
         agent_type = "food"
     
-    logger.info(f"🎯 Agent type selected: '{agent_type}' (validated)")
-    logger.info(f"🎯 Creating agent instance for type: '{agent_type}'")
+    logger.info("🎯 Agent type selected: '%s' (validated)", agent_type)
+    logger.info("🎯 Creating agent instance for type: '%s'", agent_type)
     
     # Create the appropriate agent based on type
     if agent_type == "food":
@@ -196,37 +262,28 @@ async def entrypoint(ctx: JobContext):
     else:
         # Fallback to food ordering if unknown type
         agent = FoodOrderingAgent()
-        logger.info(f"🛒 ⚠️ Starting Food Ordering Agent (fallback for unknown type: '{agent_type}')")
+        logger.info("🛒 ⚠️ Starting Food Ordering Agent (fallback for unknown type: '%s')", agent_type)
     
     # Log the agent's instructions to verify correct agent was created
-    logger.info(f"📝 Agent instructions preview: {agent.instructions[:100]}...")
+    logger.info("📝 Agent instructions preview: %s...", agent.instructions[:100])
     
     agent.set_room(ctx.room)
     
     # Add event handlers for debugging voice input
-    @session.on("user_speech_committed")
-    def on_user_speech_committed(msg: str):
-        logger.info(f"✅ User speech committed: '{msg}'")
-
-    @session.on("agent_speech_committed")  
-    def on_agent_speech_committed(msg: str):
-        logger.info(f"🤖 Agent speech committed: '{msg}'")
+    session.on("user_speech_committed", _on_user_speech_committed)
+    session.on("agent_speech_committed", _on_agent_speech_committed)
+    session.on("user_started_speaking", _on_user_started_speaking)
+    session.on("user_stopped_speaking", _on_user_stopped_speaking)
+    session.on("function_calls_collected", _on_function_calls_collected)
+    session.on("function_calls_finished", _on_function_calls_finished)
 
-    @session.on("user_started_speaking")
-    def on_user_started_speaking():
-        logger.info("🎤 User started speaking")
-
-    @session.on("user_stopped_speaking")
-    def on_user_stopped_speaking():
-        logger.info("🔇 User stopped speaking")
-
-    @session.on("function_calls_collected")
-    def on_function_calls_collected(function_calls):
-        logger.info(f"🔧 Function calls collected: {[call.function_info.name for call in function_calls]}")
-
-    @session.on("function_calls_finished")
-    def on_function_calls_finished(called_functions):
-        logger.info(f"✅ Function calls finished: {[func.function_info.name for func in called_functions]}")
+    # Add room event handlers for debugging. Registered before the session
+    # starts and the room connects so early events are not missed
+    ctx.room.on("track_published", _on_track_published)
+    ctx.room.on("track_subscribed", _on_track_subscribed)
+    ctx.room.on("participant_connected", _on_participant_connected)
+    ctx.room.on("participant_disconnected", _on_participant_disconnected)
+    ctx.room.on("data_received", _on_data_received)
 
     # Start the session, which initializes the voice pipeline and warms up the models
     await session.start(
@@ -238,29 +295,6 @@ async def entrypoint(ctx: JobContext):
     logger.info("🎯 Voice pipeline initialized - ready for audio input")
     logger.info("🔊 If you can see STT metrics but no speech detection, check microphone permissions")
 
-    # Add room event handlers for debugging
-    @ctx.room.on("track_published")
-    def on_track_published(publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
-        logger.info(f"📡 Track published: {publication.kind} from {participant.identity}")
-
-    @ctx.room.on("track_subscribed")
-    def on_track_subscribed(track: rtc.Track, publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
-        logger.info(f"📥 Track subscribed: {track.kind} from {participant.identity}")
-        if track.kind == rtc.TrackKind.KIND_AUDIO:
-            logger.info("🎵 Audio track subscribed - voice input should work now")
-
-    @ctx.room.on("participant_connected")
-    def on_participant_connected(participant: rtc.RemoteParticipant):
-        logger.info(f"👤 Participant connected: {participant.identity}")
-
-    @ctx.room.on("participant_disconnected")
-    def on_participant_disconnected(participant: rtc.RemoteParticipant):
-        logger.info(f"👋 Participant disconnected: {participant.identity}")
-
-    @ctx.room.on("data_received")
-    def on_data_received(data_packet: rtc.DataPacket):
-        logger.info(f"📨 Data received from {data_packet.participant.identity if data_packet.participant else 'unknown'}: {len(data_packet.data)} bytes")
-
     # Join the room and connect to the user
     await ctx.connect()
 
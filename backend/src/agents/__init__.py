@@ -1,5 +1,5 @@
 # Agent modules
-from .food_agent import FoodOrderingAgent, CartState, FoodCatalog
+from .food_agent import FoodOrderingAgent, CartState, CartItem, FoodCatalog
 from .fraud_agent import FraudAlertAgent, FraudCaseState
 from .wellness_agent import HealthWellnessCompanion, WellnessState
 from .tutor_agent import TutorCoordinatorAgent, TutorContent
@@ -11,6 +11,7 @@ from .improv_agent import ImprovBattleAgent
 __all__ = [
     'FoodOrderingAgent',
     'CartState',
+    'CartItem',
     'FoodCatalog',
     'FraudAlertAgent',
     'FraudCaseState',
@@ -1,18 +1,124 @@
+import asyncio
+import functools
 import logging
-import json
-import os
+import re
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Set
 
+import orjson
 from livekit.agents import Agent, function_tool, RunContext
 
+from .storage import atomic_write, mtime_cached
+from .updates import DebouncedUpdate, VersionedState
+
 logger = logging.getLogger("food_agent")
 
+# Pre-encoded envelope of the cart update message; only the cart itself is
+# serialized per publish
+CART_UPDATE_PREFIX = b'{"type":"cart_update","data":'
+
+ORDERS_DIR = Path("orders")
+
+# Characters dropped from the customer name in order ids, which double as
+# file names: whitespace, and punctuation such as path separators
+ORDER_NAME_STRIP_RE = re.compile(r"\W+")
+
+# Further attempts at saving an order file whose first write failed, and
+# the base delay between them in seconds
+ORDER_WRITE_RETRIES = 3
+ORDER_WRITE_RETRY_DELAY = 1.0
+
+
+FOOD_INSTRUCTIONS = """You are Alex, a friendly and helpful food & grocery ordering assistant for FreshMart, your neighborhood grocery store and deli.
+
+            Your personality:
+            - Warm, enthusiastic, and helpful
+            - Knowledgeable about food and cooking
+            - Patient with questions about products
+            - Excited to help customers find what they need
+            - Conversational and natural, not robotic
+
+            Your role:
+            1. Greet customers warmly and explain what you can help with
+            2. Help customers find and add items to their cart
+            3. Handle intelligent requests like "ingredients for pasta" or "what I need for a sandwich"
+            4. Manage their cart (add, remove, update quantities)
+            5. Provide information about products (price, size, brand, etc.)
+            6. Confirm cart contents when asked
+            7. Process orders when customers are ready to checkout
+            8. Save completed orders to JSON files
+
+            Key capabilities:
+            - Search for items by name, category, or type
+            - Add items with specific quantities and notes
+            - Handle recipe-based requests intelligently
+            - Show cart contents and totals
+            - Remove or update items in cart
+            - Complete orders and save them
+
+            Guidelines:
+            - Always confirm what you're adding to the cart
+            - Ask for clarification on quantities, sizes, or brands when needed
+            - Be helpful with suggestions for related items
+            - Keep track of the running total
+            - When customers say they're done, confirm the order and save it
+            - Capture basic customer info (name, address) for delivery
+
+            Remember: You're here to make grocery shopping easy and enjoyable!"""
+
+
+@functools.lru_cache(maxsize=None)
+def _ensure_dir(path: Path) -> Path:
+    """Create a directory once per process and return it."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _write_order_file(path: Path, order_data: Dict):
+    """Write a completed order to disk. Runs in a worker thread."""
+    atomic_write(path, orjson.dumps(order_data, option=orjson.OPT_INDENT_2))
+
+
+# A line in the cart: a catalog item plus the ordered quantity. orjson
+# serializes dataclasses natively, in field order, so cart lines publish and
+# save without an intermediate dict.
+@dataclass
+class CartItem:
+    __slots__ = (
+        "id", "name", "category", "price", "brand", "size", "units", "tags",
+        "quantity", "notes", "subtotal",
+    )
+    id: str
+    name: str
+    category: str
+    price: float
+    brand: Optional[str]
+    size: Optional[str]
+    units: Optional[str]
+    tags: List[str]
+    quantity: int
+    notes: str
+    subtotal: float
+
+    @classmethod
+    def from_catalog(cls, item: Dict, quantity: int, notes: str) -> "CartItem":
+        return cls(
+            item["id"], item["name"], item.get("category", ""), item["price"],
+            item.get("brand"), item.get("size"), item.get("units"), item.get("tags", []),
+            quantity, notes, item["price"] * quantity,
+        )
+
 
 # Food Ordering Cart State
-class CartState:
+class CartState(VersionedState):
+    __slots__ = ("items", "customer_name", "customer_address", "order_complete", "_by_id")
+
     def __init__(self):
-        self.items: List[Dict] = []
+        self.items: List[CartItem] = []
+        # Cart lines by item id, then by notes; insertion order follows items
+        self._by_id: Dict[str, Dict[str, CartItem]] = {}
         self.customer_name: Optional[str] = None
         self.customer_address: Optional[str] = None
         self.order_complete: bool = False
@@ -20,46 +126,51 @@ class CartState:
     def add_item(self, item: Dict, quantity: int = 1, notes: str = ""):
         """Add an item to the cart."""
         # Check if item already exists in cart
-        for cart_item in self.items:
-            if cart_item["id"] == item["id"] and cart_item.get("notes", "") == notes:
-                cart_item["quantity"] += quantity
-                return
+        variants = self._by_id.setdefault(item["id"], {})
+        cart_item = variants.get(notes)
+        if cart_item is not None:
+            cart_item.quantity += quantity
+            cart_item.subtotal = cart_item.price * cart_item.quantity
+            self._touch()
+            return
         
         # Add new item to cart
-        cart_item = {
-            **item,
-            "quantity": quantity,
-            "notes": notes,
-            "subtotal": item["price"] * quantity
-        }
+        cart_item = CartItem.from_catalog(item, quantity, notes)
         self.items.append(cart_item)
+        variants[notes] = cart_item
+        self._touch()
     
     def remove_item(self, item_id: str):
         """Remove an item from the cart."""
-        self.items = [item for item in self.items if item["id"] != item_id]
+        if self._by_id.pop(item_id, None):
+            self.items = [item for item in self.items if item.id != item_id]
     
     def update_quantity(self, item_id: str, new_quantity: int):
         """Update the quantity of an item in the cart."""
-        for item in self.items:
-            if item["id"] == item_id:
-                if new_quantity <= 0:
-                    self.remove_item(item_id)
-                else:
-                    item["quantity"] = new_quantity
-                    item["subtotal"] = item["price"] * new_quantity
-                break
+        variants = self._by_id.get(item_id)
+        if not variants:
+            return
+        if new_quantity <= 0:
+            self.remove_item(item_id)
+        else:
+            # The earliest cart line for the item, as in cart order
+            item = next(iter(variants.values()))
+            item.quantity = new_quantity
+            item.subtotal = item.price * new_quantity
+            self._touch()
     
     def get_total(self) -> float:
         """Calculate the total price of items in cart."""
-        return sum(item["subtotal"] for item in self.items)
+        return sum(item.subtotal for item in self.items)
     
     def get_item_count(self) -> int:
         """Get total number of items in cart."""
-        return sum(item["quantity"] for item in self.items)
+        return sum(item.quantity for item in self.items)
     
     def clear(self):
         """Clear all items from cart."""
         self.items = []
+        self._by_id = {}
     
     def to_dict(self) -> Dict:
         return {
@@ -79,51 +190,42 @@ class FoodCatalog:
         self.data = self._load_catalog()
         self.items = self._flatten_items()
         self.recipes = self.data.get("recipes", {})
+        # Lowercased name, category, tags and brand of each item, built once
+        # so queries don't re-lowercase the catalog. Kept apart from the
+        # items themselves, which are copied into carts and orders.
+        self._search_index = [
+            (item, self._build_haystack(item)) for item in self.items.values()
+        ]
+        self._recipe_index = [
+            (recipe["name"], f"{recipe['name'].lower()}\0{recipe_key}")
+            for recipe_key, recipe in self.recipes.items()
+        ]
     
     def _load_catalog(self) -> Dict:
         """Load catalog data from JSON file."""
         try:
-            with open(self.catalog_file, 'r') as f:
-                return json.load(f)
+            with open(self.catalog_file, 'rb') as f:
+                return orjson.loads(f.read())
         except Exception as e:
-            logger.error(f"Failed to load catalog: {e}")
+            logger.error("Failed to load catalog: %s", e)
             return {"catalog": {}, "recipes": {}}
     
     def _flatten_items(self) -> Dict[str, Dict]:
         """Create a flat dictionary of all items by ID."""
-        items = {}
         catalog = self.data.get("catalog", {})
-        for category, category_items in catalog.items():
-            for item in category_items:
-                items[item["id"]] = item
-        return items
+        return {item["id"]: item for category_items in catalog.values() for item in category_items}
+    
+    @staticmethod
+    def _build_haystack(item: Dict) -> str:
+        """Join an item's searchable fields, lowercased, with NUL separators so
+        a query can't match across two fields."""
+        fields = [item["name"], item["category"], *item.get("tags", []), item.get("brand", "")]
+        return "\0".join(fields).lower()
     
     def search_items(self, query: str) -> List[Dict]:
         """Search for items by name, category, or tags."""
         query_lower = query.lower()
-        matches = []
-        
-        for item in self.items.values():
-            # Check name
-            if query_lower in item["name"].lower():
-                matches.append(item)
-                continue
-            
-            # Check category
-            if query_lower in item["category"].lower():
-                matches.append(item)
-                continue
-            
-            # Check tags
-            if any(query_lower in tag.lower() for tag in item.get("tags", [])):
-                matches.append(item)
-                continue
-            
-            # Check brand
-            if query_lower in item.get("brand", "").lower():
-                matches.append(item)
-        
-        return matches
+        return [item for item, haystack in self._search_index if query_lower in haystack]
     
     def get_item_by_id(self, item_id: str) -> Optional[Dict]:
         """Get an item by its ID."""
@@ -148,60 +250,34 @@ class FoodCatalog:
     def search_recipes(self, query: str) -> List[str]:
         """Search for recipes by name."""
         query_lower = query.lower()
-        matches = []
-        
-        for recipe_key, recipe in self.recipes.items():
-            if query_lower in recipe["name"].lower() or query_lower in recipe_key:
-                matches.append(recipe["name"])
-        
-        return matches
+        return [name for name, haystack in self._recipe_index if query_lower in haystack]
 
 
-# Food Ordering Agent
-class FoodOrderingAgent(Agent):
-    def __init__(self):
-        super().__init__(
-            instructions="""You are Alex, a friendly and helpful food & grocery ordering assistant for FreshMart, your neighborhood grocery store and deli.
+@mtime_cached()
+def _load_food_catalog(catalog_file: str) -> FoodCatalog:
+    return FoodCatalog(catalog_file)
 
-            Your personality:
-            - Warm, enthusiastic, and helpful
-            - Knowledgeable about food and cooking
-            - Patient with questions about products
-            - Excited to help customers find what they need
-            - Conversational and natural, not robotic
 
-            Your role:
-            1. Greet customers warmly and explain what you can help with
-            2. Help customers find and add items to their cart
-            3. Handle intelligent requests like "ingredients for pasta" or "what I need for a sandwich"
-            4. Manage their cart (add, remove, update quantities)
-            5. Provide information about products (price, size, brand, etc.)
-            6. Confirm cart contents when asked
-            7. Process orders when customers are ready to checkout
-            8. Save completed orders to JSON files
+def get_food_catalog(catalog_file: str = "shared-data/food_catalog.json") -> FoodCatalog:
+    """Return the process-wide FoodCatalog for a catalog file, reloading it
+    only when the file changes. The catalog is shared and must not be mutated."""
+    return _load_food_catalog(catalog_file)
 
-            Key capabilities:
-            - Search for items by name, category, or type
-            - Add items with specific quantities and notes
-            - Handle recipe-based requests intelligently
-            - Show cart contents and totals
-            - Remove or update items in cart
-            - Complete orders and save them
 
-            Guidelines:
-            - Always confirm what you're adding to the cart
-            - Ask for clarification on quantities, sizes, or brands when needed
-            - Be helpful with suggestions for related items
-            - Keep track of the running total
-            - When customers say they're done, confirm the order and save it
-            - Capture basic customer info (name, address) for delivery
-
-            Remember: You're here to make grocery shopping easy and enjoyable!"""
+# Food Ordering Agent
+class FoodOrderingAgent(Agent):
+    def __init__(self):
+        super().__init__(
+            instructions=FOOD_INSTRUCTIONS
         )
         self.cart = CartState()
-        self.catalog = FoodCatalog()
+        self.catalog = get_food_catalog()
         self._room = None
-        self.orders_dir = "orders"
+        self._cart_update = DebouncedUpdate(self._send_cart_update)
+        self._published_cart_version = 0
+        self.orders_dir = _ensure_dir(ORDERS_DIR)
+        # Background retries of failed order writes, kept until they finish
+        self._order_write_retries: Set[asyncio.Task] = set()
     
     def set_room(self, room):
         """Set the room for sending data updates."""
@@ -209,19 +285,19 @@ class FoodOrderingAgent(Agent):
     
     async def _send_cart_update(self):
         """Send cart state update to frontend via data channel."""
-        if self._room:
+        # Skip the publish when the frontend already has this cart, or when no
+        # participant is in the room to receive it
+        version = self.cart._version
+        if self._room and self._room.remote_participants and version != self._published_cart_version:
             try:
-                cart_data = {
-                    "type": "cart_update",
-                    "data": self.cart.to_dict()
-                }
                 await self._room.local_participant.publish_data(
-                    json.dumps(cart_data).encode('utf-8'),
+                    CART_UPDATE_PREFIX + orjson.dumps(self.cart.to_dict()) + b"}",
                     topic="food_order"
                 )
-                logger.info(f"Sent cart update: {self.cart.get_item_count()} items, ${self.cart.get_total():.2f}")
+                self._published_cart_version = version
+                logger.info("Sent cart update: %s items, $%.2f", self.cart.get_item_count(), self.cart.get_total())
             except Exception as e:
-                logger.error(f"Failed to send cart update: {e}")
+                logger.error("Failed to send cart update: %s", e)
     
     @function_tool
     async def search_products(self, context: RunContext, query: str):
@@ -276,12 +352,12 @@ class FoodOrderingAgent(Agent):
         # Single match - add to cart
         item = matches[0]
         self.cart.add_item(item, quantity, notes)
-        await self._send_cart_update()
+        self._cart_update.schedule()
         
         subtotal = item["price"] * quantity
         notes_text = f" ({notes})" if notes else ""
         
-        logger.info(f"Added to cart: {quantity}x {item['name']}{notes_text} = ${subtotal:.2f}")
+        logger.info("Added to cart: %sx %s%s = $%.2f", quantity, item['name'], notes_text, subtotal)
         
         return f"Added {quantity}x {item['name']} by {item['brand']}{notes_text} to your cart for ${subtotal:.2f}. Your cart total is now ${self.cart.get_total():.2f}."
     
@@ -314,9 +390,9 @@ class FoodOrderingAgent(Agent):
             added_items.append(ingredient["name"])
             total_added += ingredient["price"]
         
-        await self._send_cart_update()
+        self._cart_update.schedule()
         
-        logger.info(f"Added recipe ingredients for {recipe_or_dish}: {', '.join(added_items)}")
+        logger.info("Added recipe ingredients for %s: %s", recipe_or_dish, ', '.join(added_items))
         
         return f"I've added all the ingredients for {recipe_or_dish} to your cart: {', '.join(added_items)}. That's ${total_added:.2f} added to your cart. Your total is now ${self.cart.get_total():.2f}."
     
@@ -329,8 +405,8 @@ class FoodOrderingAgent(Agent):
         result = f"Here's what's in your cart ({self.cart.get_item_count()} items):\n\n"
         
         for item in self.cart.items:
-            notes_text = f" ({item['notes']})" if item.get('notes') else ""
-            result += f"• {item['quantity']}x {item['name']}{notes_text} - ${item['subtotal']:.2f}\n"
+            notes_text = f" ({item.notes})" if item.notes else ""
+            result += f"• {item.quantity}x {item.name}{notes_text} - ${item.subtotal:.2f}\n"
         
         result += f"\nTotal: ${self.cart.get_total():.2f}"
         
@@ -344,21 +420,22 @@ class FoodOrderingAgent(Agent):
             item_name: Name of the item to remove
         """
         # Find matching item in cart
+        name_lower = item_name.lower()
         removed_item = None
         for item in self.cart.items:
-            if item_name.lower() in item["name"].lower():
+            if name_lower in item.name.lower():
                 removed_item = item
                 break
         
         if not removed_item:
-            return f"I couldn't find '{item_name}' in your cart. Your cart has: {', '.join([item['name'] for item in self.cart.items])}"
+            return f"I couldn't find '{item_name}' in your cart. Your cart has: {', '.join([item.name for item in self.cart.items])}"
         
-        self.cart.remove_item(removed_item["id"])
-        await self._send_cart_update()
+        self.cart.remove_item(removed_item.id)
+        self._cart_update.schedule()
         
-        logger.info(f"Removed from cart: {removed_item['name']}")
+        logger.info("Removed from cart: %s", removed_item.name)
         
-        return f"Removed {removed_item['name']} from your cart. Your new total is ${self.cart.get_total():.2f}."
+        return f"Removed {removed_item.name} from your cart. Your new total is ${self.cart.get_total():.2f}."
     
     @function_tool
     async def update_item_quantity(self, context: RunContext, item_name: str, new_quantity: int):
@@ -369,28 +446,29 @@ class FoodOrderingAgent(Agent):
             new_quantity: New quantity (use 0 to remove)
         """
         # Find matching item in cart
+        name_lower = item_name.lower()
         target_item = None
         for item in self.cart.items:
-            if item_name.lower() in item["name"].lower():
+            if name_lower in item.name.lower():
                 target_item = item
                 break
         
         if not target_item:
             return f"I couldn't find '{item_name}' in your cart."
         
-        old_quantity = target_item["quantity"]
+        old_quantity = target_item.quantity
         
         if new_quantity <= 0:
-            self.cart.remove_item(target_item["id"])
-            await self._send_cart_update()
-            return f"Removed {target_item['name']} from your cart. Your new total is ${self.cart.get_total():.2f}."
+            self.cart.remove_item(target_item.id)
+            self._cart_update.schedule()
+            return f"Removed {target_item.name} from your cart. Your new total is ${self.cart.get_total():.2f}."
         else:
-            self.cart.update_quantity(target_item["id"], new_quantity)
-            await self._send_cart_update()
+            self.cart.update_quantity(target_item.id, new_quantity)
+            self._cart_update.schedule()
             
-            logger.info(f"Updated quantity: {target_item['name']} from {old_quantity} to {new_quantity}")
+            logger.info("Updated quantity: %s from %s to %s", target_item.name, old_quantity, new_quantity)
             
-            return f"Updated {target_item['name']} quantity from {old_quantity} to {new_quantity}. Your new total is ${self.cart.get_total():.2f}."
+            return f"Updated {target_item.name} quantity from {old_quantity} to {new_quantity}. Your new total is ${self.cart.get_total():.2f}."
     
     @function_tool
     async def get_customer_info(self, context: RunContext, name: str, address: str = ""):
@@ -404,15 +482,27 @@ class FoodOrderingAgent(Agent):
         if address:
             self.cart.customer_address = address
         
-        await self._send_cart_update()
+        self._cart_update.schedule()
         
-        logger.info(f"Customer info: {name}, {address}")
+        logger.info("Customer info: %s, %s", name, address)
         
         if address:
             return f"Got it! Order for {name}, delivering to {address}."
         else:
             return f"Thanks {name}! If you need delivery, just let me know your address."
     
+    async def _send_order_complete(self, order_data: Dict):
+        """Send order completion notification to frontend"""
+        if self._room:
+            completion_data = {
+                "type": "order_complete",
+                "data": order_data
+            }
+            await self._room.local_participant.publish_data(
+                orjson.dumps(completion_data),
+                topic="food_order"
+            )
+
     @function_tool
     async def complete_order(self, context: RunContext):
         """Complete the order and save it to a JSON file."""
@@ -423,68 +513,86 @@ class FoodOrderingAgent(Agent):
             return "I need your name to complete the order. What's your name?"
         
         # Create order data
-        timestamp = datetime.now()
+        # Derive every timestamp field from a single isoformat() string
+        timestamp = datetime.now().isoformat()
+        date_str, time_str = timestamp[:10], timestamp[11:19]
+        customer_id = ORDER_NAME_STRIP_RE.sub("", self.cart.customer_name)
+        item_count = self.cart.get_item_count()
+        subtotal = self.cart.get_total()
         order_data = {
-            "order_id": f"ORDER_{timestamp.strftime('%Y%m%d_%H%M%S')}_{self.cart.customer_name.replace(' ', '')}",
-            "timestamp": timestamp.isoformat(),
-            "date": timestamp.strftime("%Y-%m-%d"),
-            "time": timestamp.strftime("%H:%M:%S"),
+            "order_id": f"ORDER_{date_str.replace('-', '')}_{time_str.replace(':', '')}_{customer_id}",
+            "timestamp": timestamp,
+            "date": date_str,
+            "time": time_str,
             "customer": {
                 "name": self.cart.customer_name,
                 "address": self.cart.customer_address or "Pickup"
             },
             "items": self.cart.items,
             "summary": {
-                "total_items": self.cart.get_item_count(),
-                "subtotal": self.cart.get_total(),
-                "tax": round(self.cart.get_total() * 0.08, 2),  # 8% tax
-                "total": round(self.cart.get_total() * 1.08, 2)
+                "total_items": item_count,
+                "subtotal": subtotal,
+                "tax": round(subtotal * 0.08, 2),  # 8% tax
+                "total": round(subtotal * 1.08, 2)
             },
             "status": "confirmed"
         }
         
-        # Create orders directory if it doesn't exist
-        os.makedirs(self.orders_dir, exist_ok=True)
+        # Save order to JSON file off the event loop while the completion
+        # notification goes out; the two are independent
+        order_filename = self.orders_dir / f"{order_data['order_id']}.json"
+        write_result, publish_result = await asyncio.gather(
+            asyncio.to_thread(_write_order_file, order_filename, order_data),
+            self._send_order_complete(order_data),
+            return_exceptions=True,
+        )
         
-        # Save order to JSON file
-        order_filename = f"{self.orders_dir}/{order_data['order_id']}.json"
-        try:
-            with open(order_filename, 'w') as f:
-                json.dump(order_data, f, indent=2)
-            
-            logger.info(f"Order saved: {order_filename}")
-            
-            # Send completion notification
-            if self._room:
-                completion_data = {
-                    "type": "order_complete",
-                    "data": order_data
-                }
-                await self._room.local_participant.publish_data(
-                    json.dumps(completion_data).encode('utf-8'),
-                    topic="food_order"
-                )
-            
-            # Create confirmation message
-            delivery_text = f"for delivery to {self.cart.customer_address}" if self.cart.customer_address else "for pickup"
-            
-            confirmation = f"Perfect! Your order has been placed and saved as {order_data['order_id']}.\n\n"
-            confirmation += f"Order Summary for {self.cart.customer_name}:\n"
-            confirmation += f"• {self.cart.get_item_count()} items\n"
-            confirmation += f"• Subtotal: ${order_data['summary']['subtotal']:.2f}\n"
-            confirmation += f"• Tax: ${order_data['summary']['tax']:.2f}\n"
-            confirmation += f"• Total: ${order_data['summary']['total']:.2f}\n\n"
-            confirmation += f"Order {delivery_text} - we'll have it ready soon! Is there anything else I can help you with?"
-            
-            # Mark order as complete and clear cart
-            self.cart.order_complete = True
-            await self._send_cart_update()
-            
-            # Clear cart for next order
-            self.cart = CartState()
-            
-            return confirmation
-            
-        except Exception as e:
-            logger.error(f"Failed to save order: {e}")
-            return f"I've confirmed your order for {self.cart.customer_name}, but there was an issue saving it. Don't worry - we have all your details and will process it manually!"
+        if isinstance(publish_result, BaseException):
+            logger.error("Failed to send order completion: %s", publish_result)
+        
+        # The order stands even when its file isn't written yet: the frontend
+        # may already show it complete, so retry the write in the background
+        # instead of failing the confirmation
+        if isinstance(write_result, BaseException):
+            logger.error("Failed to save order %s, retrying: %s", order_filename, write_result)
+            task = asyncio.create_task(self._retry_order_write(order_filename, order_data))
+            self._order_write_retries.add(task)
+            task.add_done_callback(self._order_write_retries.discard)
+            placed_text = "placed"
+        else:
+            logger.info("Order saved: %s", order_filename)
+            placed_text = "placed and saved"
+        
+        # Create confirmation message
+        delivery_text = f"for delivery to {self.cart.customer_address}" if self.cart.customer_address else "for pickup"
+        
+        confirmation = f"Perfect! Your order has been {placed_text} as {order_data['order_id']}.\n\n"
+        confirmation += f"Order Summary for {self.cart.customer_name}:\n"
+        confirmation += f"• {item_count} items\n"
+        confirmation += f"• Subtotal: ${order_data['summary']['subtotal']:.2f}\n"
+        confirmation += f"• Tax: ${order_data['summary']['tax']:.2f}\n"
+        confirmation += f"• Total: ${order_data['summary']['total']:.2f}\n\n"
+        confirmation += f"Order {delivery_text} - we'll have it ready soon! Is there anything else I can help you with?"
+        
+        # Mark order as complete and clear cart; publish immediately so a
+        # pending coalesced update can't report the cleared cart instead
+        self.cart.order_complete = True
+        await self._cart_update.flush_now()
+        
+        # Clear cart for next order
+        self.cart = CartState()
+        
+        return confirmation
+    
+    async def _retry_order_write(self, path: Path, order_data: Dict):
+        """Retry saving an order file whose first write failed."""
+        for attempt in range(1, ORDER_WRITE_RETRIES + 1):
+            await asyncio.sleep(ORDER_WRITE_RETRY_DELAY * attempt)
+            try:
+                await asyncio.to_thread(_write_order_file, path, order_data)
+            except Exception as e:
+                logger.warning("Retry %d of saving order %s failed: %s", attempt, path, e)
+            else:
+                logger.info("Order saved: %s", path)
+                return
+        logger.error("Giving up on saving order %s; it needs manual processing", path)
@@ -1,15 +1,76 @@
+import asyncio
 import logging
-import json
-import os
 from typing import Dict, List, Optional
 
+import orjson
 from livekit.agents import Agent, function_tool, RunContext
 
+from .storage import atomic_write, mtime_cached
+from .updates import DebouncedUpdate, VersionedState
+
 logger = logging.getLogger("fraud_agent")
 
 
+FRAUD_INSTRUCTIONS = """You are a professional and reassuring fraud detection representative for SecureBank, a trusted financial institution.
+
+            Your personality:
+            - Calm, professional, and reassuring
+            - Clear and direct in communication
+            - Empathetic to customer concerns
+            - Security-focused but not alarming
+            - Patient and understanding
+
+            Your role:
+            1. Introduce yourself as calling from SecureBank's Fraud Detection Department
+            2. Explain that you're calling about a suspicious transaction on their account
+            3. Verify the customer's identity using their security question (NEVER ask for full card numbers, PINs, or passwords)
+            4. If verification passes:
+               - Read out the suspicious transaction details (merchant, amount, time, location)
+               - Ask if they made this transaction
+               - Based on their answer, mark the case appropriately
+            5. If verification fails:
+               - Politely explain you cannot proceed without proper verification
+               - Suggest they contact the bank directly
+            6. Provide clear next steps and reassurance
+
+            Important guidelines:
+            - NEVER ask for sensitive information like full card numbers, PINs, or passwords
+            - Use only the security question from the database for verification
+            - Be clear about what actions will be taken
+            - Reassure customers that their account security is the priority
+            - Keep the conversation focused and professional
+            - If the transaction is fraudulent, explain the card will be blocked and a new one issued
+            - If the transaction is legitimate, confirm no further action is needed
+
+            Remember: You're here to protect the customer's account and provide peace of mind."""
+
+
+def _read_fraud_cases(path: str) -> List[Dict]:
+    """Load fraud cases from a JSON file."""
+    try:
+        with open(path, 'rb') as f:
+            data = orjson.loads(f.read())
+            return data.get('fraud_cases', [])
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error("Failed to load fraud cases: %s", e)
+    return []
+
+
+@mtime_cached()
+def get_fraud_case_index(path: str) -> Dict[str, Dict]:
+    """Return fraud cases keyed by lowercased username, re-reading the file
+    only when it changes. The cases are shared and must not be mutated."""
+    index: Dict[str, Dict] = {}
+    for case in _read_fraud_cases(path):
+        # The first case on file wins, as with a front-to-back scan
+        index.setdefault(case.get('userName', '').lower(), case)
+    return index
+
+
 # Fraud Case State
-class FraudCaseState:
+class FraudCaseState(VersionedState):
     def __init__(self):
         self.user_name: Optional[str] = None
         self.security_identifier: Optional[str] = None
@@ -22,6 +83,9 @@ class FraudCaseState:
         self.transaction_location: Optional[str] = None
         self.security_question: Optional[str] = None
         self.security_answer: Optional[str] = None
+        # Security answer as compared against, normalized once at case load;
+        # None when the case has no usable answer, which never verifies
+        self._security_answer_norm: Optional[str] = None
         self.status: str = "pending_review"
         self.outcome: Optional[str] = None
         self.verification_passed: bool = False
@@ -49,41 +113,12 @@ class FraudCaseState:
 class FraudAlertAgent(Agent):
     def __init__(self):
         super().__init__(
-            instructions="""You are a professional and reassuring fraud detection representative for SecureBank, a trusted financial institution.
-
-            Your personality:
-            - Calm, professional, and reassuring
-            - Clear and direct in communication
-            - Empathetic to customer concerns
-            - Security-focused but not alarming
-            - Patient and understanding
-
-            Your role:
-            1. Introduce yourself as calling from SecureBank's Fraud Detection Department
-            2. Explain that you're calling about a suspicious transaction on their account
-            3. Verify the customer's identity using their security question (NEVER ask for full card numbers, PINs, or passwords)
-            4. If verification passes:
-               - Read out the suspicious transaction details (merchant, amount, time, location)
-               - Ask if they made this transaction
-               - Based on their answer, mark the case appropriately
-            5. If verification fails:
-               - Politely explain you cannot proceed without proper verification
-               - Suggest they contact the bank directly
-            6. Provide clear next steps and reassurance
-
-            Important guidelines:
-            - NEVER ask for sensitive information like full card numbers, PINs, or passwords
-            - Use only the security question from the database for verification
-            - Be clear about what actions will be taken
-            - Reassure customers that their account security is the priority
-            - Keep the conversation focused and professional
-            - If the transaction is fraudulent, explain the card will be blocked and a new one issued
-            - If the transaction is legitimate, confirm no further action is needed
-
-            Remember: You're here to protect the customer's account and provide peace of mind."""
+            instructions=FRAUD_INSTRUCTIONS
         )
         self.fraud_case = FraudCaseState()
         self._room = None
+        self._published_case_version = 0
+        self._fraud_update = DebouncedUpdate(self._send_fraud_update)
         self.fraud_cases_file = "shared-data/fraud_cases.json"
         self.case_loaded = False
     
@@ -93,39 +128,38 @@ class FraudAlertAgent(Agent):
     
     async def _send_fraud_update(self):
         """Send fraud case update to frontend via data channel."""
-        if self._room:
+        # Skip the publish when the frontend already has this case state, or
+        # when no participant is in the room to receive it
+        version = self.fraud_case._version
+        if self._room and self._room.remote_participants and version != self._published_case_version:
             try:
                 fraud_data = {
                     "type": "fraud_update",
                     "data": self.fraud_case.to_dict()
                 }
                 await self._room.local_participant.publish_data(
-                    json.dumps(fraud_data).encode('utf-8'),
+                    orjson.dumps(fraud_data),
                     topic="fraud_alert"
                 )
-                logger.info(f"Sent fraud update: {fraud_data}")
+                self._published_case_version = version
+                logger.info("Sent fraud update: %s", fraud_data)
             except Exception as e:
-                logger.error(f"Failed to send fraud update: {e}")
+                logger.error("Failed to send fraud update: %s", e)
     
     def _load_fraud_cases(self) -> List[Dict]:
         """Load fraud cases from JSON file."""
-        try:
-            if os.path.exists(self.fraud_cases_file):
-                with open(self.fraud_cases_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('fraud_cases', [])
-        except Exception as e:
-            logger.error(f"Failed to load fraud cases: {e}")
-        return []
+        return _read_fraud_cases(self.fraud_cases_file)
     
     def _save_fraud_cases(self, cases: List[Dict]):
         """Save fraud cases back to JSON file."""
         try:
-            with open(self.fraud_cases_file, 'w') as f:
-                json.dump({"fraud_cases": cases}, f, indent=2)
-            logger.info(f"Fraud cases saved to {self.fraud_cases_file}")
+            atomic_write(
+                self.fraud_cases_file,
+                orjson.dumps({"fraud_cases": cases}, option=orjson.OPT_INDENT_2),
+            )
+            logger.info("Fraud cases saved to %s", self.fraud_cases_file)
         except Exception as e:
-            logger.error(f"Failed to save fraud cases: {e}")
+            logger.error("Failed to save fraud cases: %s", e)
     
     @function_tool
     async def load_fraud_case_by_username(self, context: RunContext, user_name: str):
@@ -134,14 +168,10 @@ class FraudAlertAgent(Agent):
         Args:
             user_name: The customer's name to look up their fraud case
         """
-        cases = self._load_fraud_cases()
+        cases = await asyncio.to_thread(get_fraud_case_index, self.fraud_cases_file)
         
         # Find case matching the username (case-insensitive)
-        matching_case = None
-        for case in cases:
-            if case.get('userName', '').lower() == user_name.lower():
-                matching_case = case
-                break
+        matching_case = cases.get(user_name.lower())
         
         if not matching_case:
             return f"I'm sorry, I don't have a fraud case on file for {user_name}. Could you please verify your name?"
@@ -158,12 +188,13 @@ class FraudAlertAgent(Agent):
         self.fraud_case.transaction_location = matching_case.get('transactionLocation')
         self.fraud_case.security_question = matching_case.get('securityQuestion')
         self.fraud_case.security_answer = matching_case.get('securityAnswer')
+        self.fraud_case._security_answer_norm = (self.fraud_case.security_answer or "").lower().strip() or None
         self.fraud_case.status = matching_case.get('status', 'pending_review')
         
         self.case_loaded = True
         
-        logger.info(f"Loaded fraud case for {user_name}")
-        await self._send_fraud_update()
+        logger.info("Loaded fraud case for %s", user_name)
+        self._fraud_update.schedule()
         
         return f"Thank you, {user_name}. I have your case pulled up. For security purposes, I need to verify your identity before we proceed. {self.fraud_case.security_question}"
     
@@ -178,21 +209,22 @@ class FraudAlertAgent(Agent):
             return "I need to load your fraud case first. Can you please provide your name?"
         
         # Check if answer matches (case-insensitive)
-        if answer.lower().strip() == self.fraud_case.security_answer.lower().strip():
+        expected = self.fraud_case._security_answer_norm
+        if expected is not None and answer.lower().strip() == expected:
             self.fraud_case.verification_passed = True
-            logger.info(f"Identity verification passed for {self.fraud_case.user_name}")
-            await self._send_fraud_update()
+            logger.info("Identity verification passed for %s", self.fraud_case.user_name)
+            self._fraud_update.schedule()
             
             return f"Thank you for verifying your identity. Now, let me tell you about the suspicious transaction we detected. On {self.fraud_case.transaction_time}, we noticed a charge of {self.fraud_case.transaction_amount} to {self.fraud_case.transaction_name} from {self.fraud_case.transaction_location}. The transaction was made through {self.fraud_case.transaction_source} for {self.fraud_case.transaction_category}. Did you make this purchase?"
         else:
             self.fraud_case.verification_passed = False
             self.fraud_case.status = "verification_failed"
             self.fraud_case.outcome = "Customer failed identity verification. Advised to contact bank directly."
-            logger.warning(f"Identity verification failed for {self.fraud_case.user_name}")
+            logger.warning("Identity verification failed for %s", self.fraud_case.user_name)
             
             # Save the failed verification
-            self._update_case_in_database()
-            await self._send_fraud_update()
+            await asyncio.to_thread(self._update_case_in_database)
+            self._fraud_update.schedule()
             
             return "I'm sorry, but that answer doesn't match our records. For your security, I cannot proceed with this call. Please contact SecureBank directly at 1-800-SECURE-BANK or visit your nearest branch with a valid ID. Your account security is our top priority."
     
@@ -213,11 +245,11 @@ class FraudAlertAgent(Agent):
             self.fraud_case.status = "confirmed_safe"
             self.fraud_case.outcome = "Customer confirmed the transaction as legitimate. No action required."
             
-            logger.info(f"Transaction confirmed as safe by {self.fraud_case.user_name}")
+            logger.info("Transaction confirmed as safe by %s", self.fraud_case.user_name)
             
             # Update database
-            self._update_case_in_database()
-            await self._send_fraud_update()
+            await asyncio.to_thread(self._update_case_in_database)
+            self._fraud_update.schedule()
             
             return f"Excellent! Thank you for confirming that you made this purchase. I've marked this transaction as legitimate in our system, and no further action is needed. Your card ending in {self.fraud_case.card_ending} remains active and secure. Is there anything else I can help you with today?"
         else:
@@ -225,16 +257,17 @@ class FraudAlertAgent(Agent):
             self.fraud_case.status = "confirmed_fraud"
             self.fraud_case.outcome = "Customer denied making the transaction. Card blocked, dispute initiated, new card being issued."
             
-            logger.info(f"Transaction confirmed as fraudulent by {self.fraud_case.user_name}")
+            logger.info("Transaction confirmed as fraudulent by %s", self.fraud_case.user_name)
             
             # Update database
-            self._update_case_in_database()
-            await self._send_fraud_update()
+            await asyncio.to_thread(self._update_case_in_database)
+            self._fraud_update.schedule()
             
             return f"I understand, and I'm sorry this happened to you. For your protection, I'm taking immediate action. I've blocked your card ending in {self.fraud_case.card_ending} to prevent any further unauthorized charges. We're initiating a dispute for the {self.fraud_case.transaction_amount} charge, and you should see that amount credited back to your account within 5-7 business days. A new card will be sent to your address on file within 3-5 business days. You will not be held responsible for this fraudulent charge. Is there anything else you'd like me to clarify?"
     
     def _update_case_in_database(self):
-        """Update the fraud case in the database with current status."""
+        """Update the fraud case in the database with current status. Runs in a
+        worker thread."""
         cases = self._load_fraud_cases()
         
         # Find and update the matching case
@@ -1,15 +1,101 @@
+import asyncio
+import functools
 import logging
-import json
-import os
+import re
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import orjson
 from livekit.agents import Agent, function_tool, RunContext
 
+from .storage import append_jsonl, mtime_cached
+from .updates import DebouncedUpdate
+
 logger = logging.getLogger("sdr_agent")
 
+# Pre-encoded envelope of the lead update message; only the lead itself is
+# serialized per publish
+LEAD_UPDATE_PREFIX = b'{"type":"lead_update","data":'
+
+# Timeline keywords, matched as substrings (so "immediately" and "weeks" count)
+TIMELINE_NOW_RE = re.compile("now|immediate|urgent|asap|today")
+TIMELINE_SOON_RE = re.compile("soon|week|month|next")
+
+# Timeline phrase of the saved conversation summary
+TIMELINE_SUMMARY_TEXT = {
+    "now": "looking to start immediately",
+    "soon": "planning to start soon",
+    "later": "exploring options for the future",
+}
+
+# Follow-up promise of the closing recap, per timeline; "later" is the fallback
+TIMELINE_FOLLOW_UP_TEMPLATES = {
+    "now": "Since you're looking to get started right away, our team will reach out to you at {email} within the next few hours to help you get set up. ",
+    "soon": "We'll send you detailed information to {email} and our team will follow up with you soon. ",
+    "later": "We'll send you some helpful resources to {email} and you can reach out whenever you're ready. ",
+}
+
+
+SDR_INSTRUCTIONS = """You are a friendly and professional Sales Development Representative (SDR) for Razorpay, India's leading payment gateway company.
+
+            Your personality:
+            - Warm, professional, and genuinely helpful
+            - Curious about the prospect's needs and challenges
+            - Knowledgeable about Razorpay's products and services
+            - Focused on understanding before selling
+            - Natural conversational style, not pushy or aggressive
+            - Ask thoughtful follow-up questions
+
+            Your primary goals:
+            1. Greet visitors warmly and make them feel welcome
+            2. Understand what brought them here and what they're working on
+            3. Answer questions about Razorpay using the FAQ knowledge base
+            4. Naturally collect lead information during the conversation:
+               - Name
+               - Company name
+               - Email address
+               - Role/position
+               - Use case (what they want to use Razorpay for)
+               - Team size (optional)
+               - Timeline (now / soon / later)
+            5. Keep the conversation focused on their needs
+            6. When they're done, provide a summary and confirm details
+
+            Important guidelines:
+            - Don't ask for all information at once - collect it naturally during conversation
+            - Use the FAQ tools to answer product questions accurately
+            - Don't make up information not in the FAQ
+            - Be helpful and consultative, not pushy
+            - Listen more than you talk
+            - When you sense the conversation is ending, summarize and confirm their details
+
+            Remember: You're here to help and understand their needs, not just collect information."""
+
 
 class LeadState:
+    # Field order of the serialized lead
+    _FIELDS = (
+        "name",
+        "company",
+        "email",
+        "role",
+        "use_case",
+        "team_size",
+        "timeline",
+        "questions_asked",
+        "conversation_summary",
+        "call_complete",
+    )
+    # Fields reported as missing, with their spoken labels
+    _IMPORTANT_FIELDS = (
+        ("name", "name"),
+        ("email", "email"),
+        ("company", "company"),
+        ("use_case", "use case"),
+        ("timeline", "timeline"),
+    )
+    __slots__ = _FIELDS
+
     def __init__(self):
         self.name: Optional[str] = None
         self.company: Optional[str] = None
@@ -22,19 +108,12 @@ class LeadState:
         self.conversation_summary: str = ""
         self.call_complete: bool = False
     
-    def to_dict(self) -> Dict:
-        return {
-            "name": self.name,
-            "company": self.company,
-            "email": self.email,
-            "role": self.role,
-            "use_case": self.use_case,
-            "team_size": self.team_size,
-            "timeline": self.timeline,
-            "questions_asked": self.questions_asked,
-            "conversation_summary": self.conversation_summary,
-            "call_complete": self.call_complete
-        }
+    def to_dict(self, extra: Optional[Dict] = None) -> Dict:
+        """Return the lead as a dict, with any extra keys merged into the same dict."""
+        data = {field: getattr(self, field) for field in self._FIELDS}
+        if extra:
+            data.update(extra)
+        return data
     
     def is_complete(self) -> bool:
         """Check if we have minimum required lead information."""
@@ -46,18 +125,7 @@ class LeadState:
     
     def get_missing_fields(self) -> List[str]:
         """Get list of missing important fields."""
-        missing = []
-        if not self.name:
-            missing.append("name")
-        if not self.email:
-            missing.append("email")
-        if not self.company:
-            missing.append("company")
-        if not self.use_case:
-            missing.append("use case")
-        if not self.timeline:
-            missing.append("timeline")
-        return missing
+        return [label for field, label in self._IMPORTANT_FIELDS if not getattr(self, field)]
 
 
 class CompanyFAQ:
@@ -68,35 +136,46 @@ class CompanyFAQ:
         self.products = self.data.get("products", [])
         self.faq_items = self.data.get("faq", [])
         self.use_cases = self.data.get("use_cases", [])
+        self._search_terms = [self._build_search_terms(item) for item in self.faq_items]
+        # Prospects often repeat a question; memoize results per lowercased query
+        self._search_cached = functools.lru_cache(maxsize=256)(self._search_lowered)
     
     def _load_faq(self) -> Dict:
         """Load FAQ data from JSON file."""
         try:
-            with open(self.faq_file, 'r') as f:
-                return json.load(f)
+            with open(self.faq_file, 'rb') as f:
+                return orjson.loads(f.read())
         except Exception as e:
-            logger.error(f"Failed to load FAQ data: {e}")
+            logger.error("Failed to load FAQ data: %s", e)
             return {}
     
+    @staticmethod
+    def _build_search_terms(item: Dict) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """Lowercase an FAQ item's keywords and long question words once at load."""
+        keywords = tuple(keyword.lower() for keyword in item.get("keywords", []))
+        question_words = tuple(word for word in item["question"].lower().split() if len(word) > 3)
+        return keywords, question_words
+    
     def search_faq(self, query: str) -> Optional[Dict]:
         """Search FAQ for relevant answer using simple keyword matching."""
-        query_lower = query.lower()
-        
+        return self._search_cached(query.lower())
+    
+    def _search_lowered(self, query_lower: str) -> Optional[Dict]:
+        """Score every FAQ item against an already-lowercased query."""
         # Search through FAQ items
         best_match = None
         best_score = 0
         
-        for item in self.faq_items:
+        for item, (keywords, question_words) in zip(self.faq_items, self._search_terms):
             score = 0
             # Check keywords
-            for keyword in item.get("keywords", []):
-                if keyword.lower() in query_lower:
+            for keyword in keywords:
+                if keyword in query_lower:
                     score += 2
             
             # Check question text
-            question_words = item["question"].lower().split()
             for word in question_words:
-                if len(word) > 3 and word in query_lower:
+                if word in query_lower:
                     score += 1
             
             if score > best_score:
@@ -118,48 +197,25 @@ class CompanyFAQ:
         return f"Our main products include {', '.join(product_names)}, and more."
 
 
-class SDRAgent(Agent):
-    def __init__(self):
-        super().__init__(
-            instructions=f"""You are a friendly and professional Sales Development Representative (SDR) for Razorpay, India's leading payment gateway company.
+@mtime_cached()
+def _load_company_faq(faq_file: str) -> CompanyFAQ:
+    return CompanyFAQ(faq_file)
 
-            Your personality:
-            - Warm, professional, and genuinely helpful
-            - Curious about the prospect's needs and challenges
-            - Knowledgeable about Razorpay's products and services
-            - Focused on understanding before selling
-            - Natural conversational style, not pushy or aggressive
-            - Ask thoughtful follow-up questions
 
-            Your primary goals:
-            1. Greet visitors warmly and make them feel welcome
-            2. Understand what brought them here and what they're working on
-            3. Answer questions about Razorpay using the FAQ knowledge base
-            4. Naturally collect lead information during the conversation:
-               - Name
-               - Company name
-               - Email address
-               - Role/position
-               - Use case (what they want to use Razorpay for)
-               - Team size (optional)
-               - Timeline (now / soon / later)
-            5. Keep the conversation focused on their needs
-            6. When they're done, provide a summary and confirm details
+def get_company_faq(faq_file: str = "shared-data/sdr_company_faq.json") -> CompanyFAQ:
+    """Return the process-wide CompanyFAQ for an FAQ file, reloading it only
+    when the file changes. The FAQ is shared and must not be mutated."""
+    return _load_company_faq(faq_file)
 
-            Important guidelines:
-            - Don't ask for all information at once - collect it naturally during conversation
-            - Use the FAQ tools to answer product questions accurately
-            - Don't make up information not in the FAQ
-            - Be helpful and consultative, not pushy
-            - Listen more than you talk
-            - When you sense the conversation is ending, summarize and confirm their details
 
-            Remember: You're here to help and understand their needs, not just collect information."""
-        )
+class SDRAgent(Agent):
+    def __init__(self):
+        super().__init__(instructions=SDR_INSTRUCTIONS)
         self.lead_state = LeadState()
-        self.company_faq = CompanyFAQ()
+        self.company_faq = get_company_faq()
         self._room = None
-        self.leads_file = "shared-data/leads_sample.json"
+        self._lead_update = DebouncedUpdate(self._send_lead_update)
+        self.leads_file = "shared-data/leads_sample.jsonl"
     
     def set_room(self, room):
         """Set the room for sending data updates."""
@@ -169,17 +225,20 @@ class SDRAgent(Agent):
         """Send lead state update to frontend via data channel."""
         if self._room:
             try:
-                lead_data = {
-                    "type": "lead_update",
-                    "data": self.lead_state.to_dict()
-                }
+                lead = self.lead_state.to_dict()
                 await self._room.local_participant.publish_data(
-                    json.dumps(lead_data).encode('utf-8'),
+                    LEAD_UPDATE_PREFIX + orjson.dumps(lead) + b"}",
                     topic="sdr_session"
                 )
-                logger.info(f"Sent lead update: {lead_data}")
+                logger.info("Sent lead update: %s", lead)
             except Exception as e:
-                logger.error(f"Failed to send lead update: {e}")
+                logger.error("Failed to send lead update: %s", e)
+    
+    def _record_field(self, field: str, value: str, label: str) -> None:
+        """Store a lead field, log it and schedule a lead update for the frontend."""
+        setattr(self.lead_state, field, value)
+        logger.info("Recorded %s: %s", label, value)
+        self._lead_update.schedule()
     
     @function_tool
     async def answer_company_question(self, context: RunContext, question: str):
@@ -196,11 +255,11 @@ class SDRAgent(Agent):
         
         if faq_match:
             answer = faq_match["answer"]
-            logger.info(f"Found FAQ answer for: {question}")
+            logger.info("Found FAQ answer for: %s", question)
             return f"{answer} Is there anything else you'd like to know about this?"
         else:
             # Provide general company info if no specific match
-            logger.info(f"No specific FAQ match for: {question}")
+            logger.info("No specific FAQ match for: %s", question)
             return f"That's a great question! Let me share what I know. {self.company_faq.get_company_overview()} Would you like me to connect you with our team for more specific details about that?"
     
     @function_tool
@@ -217,9 +276,7 @@ class SDRAgent(Agent):
         Args:
             name: The prospect's full name
         """
-        self.lead_state.name = name
-        logger.info(f"Recorded lead name: {name}")
-        await self._send_lead_update()
+        self._record_field("name", name, "lead name")
         return f"Great to meet you, {name}!"
     
     @function_tool
@@ -229,9 +286,7 @@ class SDRAgent(Agent):
         Args:
             company: The name of the prospect's company
         """
-        self.lead_state.company = company
-        logger.info(f"Recorded company: {company}")
-        await self._send_lead_update()
+        self._record_field("company", company, "company")
         return f"Thanks! Tell me more about what {company} does."
     
     @function_tool
@@ -241,9 +296,7 @@ class SDRAgent(Agent):
         Args:
             email: The prospect's email address
         """
-        self.lead_state.email = email
-        logger.info(f"Recorded email: {email}")
-        await self._send_lead_update()
+        self._record_field("email", email, "email")
         return f"Perfect, I've got your email as {email}."
     
     @function_tool
@@ -253,9 +306,7 @@ class SDRAgent(Agent):
         Args:
             role: The prospect's job title or role (e.g., founder, CTO, product manager)
         """
-        self.lead_state.role = role
-        logger.info(f"Recorded role: {role}")
-        await self._send_lead_update()
+        self._record_field("role", role, "role")
         return f"Got it, you're the {role}."
     
     @function_tool
@@ -265,9 +316,7 @@ class SDRAgent(Agent):
         Args:
             use_case: Description of how they plan to use Razorpay (e.g., ecommerce payments, subscription billing)
         """
-        self.lead_state.use_case = use_case
-        logger.info(f"Recorded use case: {use_case}")
-        await self._send_lead_update()
+        self._record_field("use_case", use_case, "use case")
         return f"That's a great use case! {use_case} is something we handle really well."
     
     @function_tool
@@ -277,9 +326,7 @@ class SDRAgent(Agent):
         Args:
             team_size: Size of the team (e.g., 1-10, 10-50, 50+, just me)
         """
-        self.lead_state.team_size = team_size
-        logger.info(f"Recorded team size: {team_size}")
-        await self._send_lead_update()
+        self._record_field("team_size", team_size, "team size")
         return f"Thanks for sharing that!"
     
     @function_tool
@@ -291,16 +338,16 @@ class SDRAgent(Agent):
         """
         # Normalize timeline to standard values
         timeline_lower = timeline.lower()
-        if any(word in timeline_lower for word in ["now", "immediate", "urgent", "asap", "today"]):
+        if TIMELINE_NOW_RE.search(timeline_lower):
             normalized_timeline = "now"
-        elif any(word in timeline_lower for word in ["soon", "week", "month", "next"]):
+        elif TIMELINE_SOON_RE.search(timeline_lower):
             normalized_timeline = "soon"
         else:
             normalized_timeline = "later"
         
         self.lead_state.timeline = normalized_timeline
-        logger.info(f"Recorded timeline: {normalized_timeline} (from: {timeline})")
-        await self._send_lead_update()
+        logger.info("Recorded timeline: %s (from: %s)", normalized_timeline, timeline)
+        self._lead_update.schedule()
         
         if normalized_timeline == "now":
             return "That's great! We can get you set up very quickly. Our onboarding typically takes less than 15 minutes."
@@ -341,43 +388,24 @@ class SDRAgent(Agent):
             summary_parts.append(f"interested in {self.lead_state.use_case}")
         
         if self.lead_state.timeline:
-            timeline_text = {
-                "now": "looking to start immediately",
-                "soon": "planning to start soon",
-                "later": "exploring options for the future"
-            }.get(self.lead_state.timeline, "")
+            timeline_text = TIMELINE_SUMMARY_TEXT.get(self.lead_state.timeline, "")
             if timeline_text:
                 summary_parts.append(timeline_text)
         
         self.lead_state.conversation_summary = " - ".join(summary_parts)
         
         # Prepare lead data
-        lead_data = {
-            **self.lead_state.to_dict(),
+        lead_data = self.lead_state.to_dict({
             "date": timestamp.strftime("%Y-%m-%d"),
             "time": timestamp.strftime("%H:%M:%S"),
             "timestamp": timestamp.isoformat(),
             "questions_count": len(self.lead_state.questions_asked)
-        }
-        
-        # Load existing leads or create new structure
-        leads_log = {"leads": []}
-        try:
-            if os.path.exists(self.leads_file):
-                with open(self.leads_file, 'r') as f:
-                    leads_log = json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load existing leads: {e}")
-        
-        # Add new lead
-        leads_log["leads"].append(lead_data)
+        })
         
-        # Save to JSON file
         try:
-            with open(self.leads_file, 'w') as f:
-                json.dump(leads_log, f, indent=2)
+            await asyncio.to_thread(append_jsonl, self.leads_file, lead_data)
             
-            logger.info(f"Lead saved to {self.leads_file}")
+            logger.info("Lead saved to %s", self.leads_file)
             
             # Send completion notification
             completion_data = {
@@ -386,7 +414,7 @@ class SDRAgent(Agent):
             }
             if self._room:
                 await self._room.local_participant.publish_data(
-                    json.dumps(completion_data).encode('utf-8'),
+                    orjson.dumps(completion_data),
                     topic="sdr_session"
                 )
             
@@ -395,21 +423,18 @@ class SDRAgent(Agent):
             summary += f"Let me quickly recap: You're {self.lead_state.role} at {self.lead_state.company}, " if self.lead_state.role else f"You're from {self.lead_state.company}, "
             summary += f"and you're interested in using Razorpay for {self.lead_state.use_case}. "
             
-            if self.lead_state.timeline == "now":
-                summary += f"Since you're looking to get started right away, our team will reach out to you at {self.lead_state.email} within the next few hours to help you get set up. "
-            elif self.lead_state.timeline == "soon":
-                summary += f"We'll send you detailed information to {self.lead_state.email} and our team will follow up with you soon. "
-            else:
-                summary += f"We'll send you some helpful resources to {self.lead_state.email} and you can reach out whenever you're ready. "
+            follow_up = TIMELINE_FOLLOW_UP_TEMPLATES.get(self.lead_state.timeline, TIMELINE_FOLLOW_UP_TEMPLATES["later"])
+            summary += follow_up.format(email=self.lead_state.email)
             
             summary += "Is there anything else I can help you with today?"
             
-            # Mark call as complete
+            # Mark call as complete; publish immediately in place of any
+            # pending coalesced update
             self.lead_state.call_complete = True
-            await self._send_lead_update()
+            await self._lead_update.flush_now()
             
             return summary
             
         except Exception as e:
-            logger.error(f"Failed to save lead: {e}")
+            logger.error("Failed to save lead: %s", e)
             return f"Thank you for your time, {self.lead_state.name}! I've noted all your information and our team will be in touch at {self.lead_state.email}. Is there anything else I can help with?"
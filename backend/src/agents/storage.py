@@ -0,0 +1,68 @@
+import functools
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import orjson
+
+T = TypeVar("T")
+
+
+def append_jsonl(path, record: Dict) -> int:
+    """Append a record as one line of an NDJSON log and return the log's new
+    mtime in nanoseconds. Runs in a worker thread."""
+    line = orjson.dumps(record) + b"\n"
+    # O_APPEND makes the single small write atomic, so concurrent calls
+    # never interleave or rewrite earlier records. O_CLOEXEC is POSIX-only.
+    flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        os.write(fd, line)
+        return os.fstat(fd).st_mtime_ns
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data: bytes) -> None:
+    """Write a file by renaming a temporary file over it, so a crash
+    mid-write never leaves a truncated file behind. Runs in a worker thread."""
+    directory, name = os.path.split(os.fspath(path))
+    # A unique name in the target's directory, so concurrent writers never
+    # share a temporary file and the rename stays on one filesystem
+    fd, tmp = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp creates the file 0600; os.fchmod is POSIX-only before 3.13
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _mtime_ns(path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def mtime_cached(maxsize: int = 4) -> Callable[[Callable[[Any], T]], Callable[[Any], T]]:
+    """Cache a loader by file path, calling it again only when the file's
+    mtime changes. Cached results are shared and must not be mutated."""
+    def decorator(load: Callable[[Any], T]) -> Callable[[Any], T]:
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(path, mtime_ns: Optional[int]) -> T:
+            return load(path)
+
+        @functools.wraps(load)
+        def wrapper(path) -> T:
+            return cached(path, _mtime_ns(path))
+
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
@@ -1,34 +1,120 @@
+import contextlib
 import logging
-import json
 import random
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import orjson
 from livekit.agents import Agent, function_tool, RunContext
 
+from .storage import mtime_cached
+
 logger = logging.getLogger("tutor_agent")
 
+# Key points looked for in quiz answers, per concept
+QUIZ_KEY_POINTS = {
+    "variables": ("store", "container", "data", "value", "reuse"),
+    "loops": ("repeat", "iteration", "for", "while", "condition"),
+    "functions": ("reusable", "parameters", "return", "organize", "block"),
+    "conditionals": ("decision", "if", "condition", "true", "false"),
+}
+
+# Key points looked for in teach-back explanations, per concept
+TEACH_BACK_KEY_POINTS = {
+    "variables": ("store", "data", "value", "container", "reuse", "name"),
+    "loops": ("repeat", "iteration", "for", "while", "condition", "multiple"),
+    "functions": ("reusable", "parameters", "return", "organize", "input", "output"),
+    "conditionals": ("decision", "if", "condition", "true", "false", "branch"),
+}
+
+# Static closing sentences of the quiz and teach-back feedback
+QUIZ_NEXT_EXCELLENT = "Would you like to try another question or switch to teach-back mode to explain a concept to me?"
+QUIZ_NEXT_GOOD = "Would you like to try answering again or move on to another concept?"
+QUIZ_NEXT_LOW = "Now that you have more context, would you like to try the question again?"
+TEACH_BACK_THANKS = "Thank you for that explanation! "
+TEACH_BACK_NEXT_EXCELLENT = (
+    "Your explanation shows you really understand this topic. "
+    "Would you like to explain another concept or try a different learning mode?"
+)
+TEACH_BACK_NEXT_GOOD = "What examples can you think of?"
+TEACH_BACK_NEXT_LOW = "Try to think about the main purpose and benefits. What problem do they solve?"
+
+# Score needed for the excellent and good feedback tiers
+QUIZ_THRESHOLDS = (0.5, 0.25)
+TEACH_BACK_THRESHOLDS = (0.7, 0.4)
+
+
+TUTOR_INSTRUCTIONS = """You are the Teach-the-Tutor Active Recall Coach. You help users learn programming concepts through three different modes.
+
+            Available modes and voices:
+            - LEARN: You explain programming concepts clearly (Matthew's voice)
+            - QUIZ: You test understanding with questions (Alicia's voice)  
+            - TEACH_BACK: You listen as users explain concepts back (Ken's voice)
+
+            Available concepts: variables, loops, functions, conditionals
+
+            Your role:
+            - Start by greeting users and explaining the three learning modes
+            - Help users choose the right mode for their needs
+            - Switch between modes when requested
+            - In LEARN mode: explain concepts clearly with examples
+            - In QUIZ mode: ask questions and evaluate answers
+            - In TEACH_BACK mode: listen to explanations and provide feedback
+            - Keep track of learning progress
+            - Encourage active learning and recall
+
+            Always be enthusiastic about learning and adapt your personality to the current mode."""
+
+
+def _score_key_points(text_lower: str, key_points: Optional[Tuple[str, ...]]) -> Tuple[float, List[str]]:
+    """Return the fraction of key points found in the text, and the matched points in order."""
+    if not key_points:
+        return 0, []
+    matched = [point for point in key_points if point in text_lower]
+    return len(matched) / len(key_points), matched
+
 
 class TutorContent:
     def __init__(self, content_file: str = "shared-data/day4_tutor_content.json"):
         self.content_file = content_file
         self.concepts = self._load_content()
+        self._by_id = {c['id']: c for c in self.concepts}
+        self.concept_ids = ", ".join(self._by_id)
+        self.concept_list = ", ".join(f"{c['title']} ({c['id']})" for c in self.concepts)
+        # Per-concept replies of the mode-entry tools, formatted once at load
+        self.explanations = {
+            c['id']: (
+                f"Let me explain {c['title']} for you. {c['summary']} "
+                "This is a fundamental concept in programming that you'll use constantly. "
+                f"Would you like me to go deeper into any aspect of {c['title']}, or are you ready to test your understanding?"
+            )
+            for c in self.concepts
+        }
+        self.quiz_prompts = {
+            c['id']: f"Great! Let's test your understanding of {c['title']}. Here's your question: {c['sample_question']}"
+            for c in self.concepts
+        }
+        self.teach_back_prompts = {
+            c['id']: (
+                f"Perfect! I'd love to hear you explain {c['title']} to me. Pretend I'm a complete beginner - "
+                f"can you teach me what {c['title'].lower()} are and why they're important in programming? "
+                "Take your time and explain it in your own words."
+            )
+            for c in self.concepts
+        }
     
     def _load_content(self) -> List[Dict]:
         """Load tutor content from JSON file."""
         try:
-            with open(self.content_file, 'r') as f:
-                return json.load(f)
+            with open(self.content_file, 'rb') as f:
+                return orjson.loads(f.read())
         except Exception as e:
-            logger.error(f"Failed to load tutor content: {e}")
+            logger.error("Failed to load tutor content: %s", e)
             return []
     
     def get_concept(self, concept_id: str) -> Optional[Dict]:
         """Get a specific concept by ID."""
-        for concept in self.concepts:
-            if concept['id'] == concept_id:
-                return concept
-        return None
+        return self._by_id.get(concept_id)
     
     def get_all_concepts(self) -> List[Dict]:
         """Get all available concepts."""
@@ -41,39 +127,67 @@ class TutorContent:
         return None
 
 
-class TutorCoordinatorAgent(Agent):
-    def __init__(self):
-        super().__init__(
-            instructions="""You are the Teach-the-Tutor Active Recall Coach. You help users learn programming concepts through three different modes.
+@mtime_cached()
+def _load_tutor_content(content_file: str) -> TutorContent:
+    return TutorContent(content_file)
 
-            Available modes and voices:
-            - LEARN: You explain programming concepts clearly (Matthew's voice)
-            - QUIZ: You test understanding with questions (Alicia's voice)  
-            - TEACH_BACK: You listen as users explain concepts back (Ken's voice)
 
-            Available concepts: variables, loops, functions, conditionals
+def get_tutor_content(content_file: str = "shared-data/day4_tutor_content.json") -> TutorContent:
+    """Return the process-wide TutorContent for a content file, reloading it
+    only when the file changes. The content is shared and must not be mutated."""
+    return _load_tutor_content(content_file)
 
-            Your role:
-            - Start by greeting users and explaining the three learning modes
-            - Help users choose the right mode for their needs
-            - Switch between modes when requested
-            - In LEARN mode: explain concepts clearly with examples
-            - In QUIZ mode: ask questions and evaluate answers
-            - In TEACH_BACK mode: listen to explanations and provide feedback
-            - Keep track of learning progress
-            - Encourage active learning and recall
 
-            Always be enthusiastic about learning and adapt your personality to the current mode."""
+class TutorCoordinatorAgent(Agent):
+    def __init__(self):
+        super().__init__(
+            instructions=TUTOR_INSTRUCTIONS
         )
         self.current_mode = "coordinator"
-        self.tutor_content = TutorContent()
+        self.tutor_content = get_tutor_content()
         self.current_concept = None
         self._room = None
+        # Events collected by _batch_publish, or None when publishing directly
+        self._batch_buf: Optional[List[dict]] = None
+        # Timestamp shared by the events of the open batch
+        self._batch_time: Optional[datetime] = None
     
     def set_room(self, room):
         """Set the room for sending updates."""
         self._room = room
     
+    async def _publish_event(self, event: dict) -> bool:
+        """Publish an event to the frontend, or queue it while a batch is open.
+        Returns whether the event was published now."""
+        if self._batch_buf is not None:
+            self._batch_buf.append(event)
+            return False
+        await self._room.local_participant.publish_data(
+            orjson.dumps(event),
+            topic="tutor_session"
+        )
+        return True
+    
+    @contextlib.asynccontextmanager
+    async def _batch_publish(self):
+        """Collect the events sent inside the block and publish them as one frame."""
+        self._batch_buf = []
+        self._batch_time = datetime.now()
+        try:
+            yield
+        finally:
+            events, self._batch_buf = self._batch_buf, None
+            self._batch_time = None
+        if self._room and events:
+            try:
+                await self._room.local_participant.publish_data(
+                    orjson.dumps({"type": "batch", "events": events}),
+                    topic="tutor_session"
+                )
+                logger.info("Sent tutor batch: %s", ", ".join(event["type"] for event in events))
+            except Exception as e:
+                logger.error("Failed to send tutor batch: %s", e)
+    
     async def _send_mode_change(self, new_mode: str):
         """Send mode change notification to frontend."""
         if self._room:
@@ -85,16 +199,16 @@ class TutorCoordinatorAgent(Agent):
                     "data": {
                         "concept_id": self.current_concept['id'] if self.current_concept else None,
                         "activity": f"Switched to {new_mode} mode",
-                        "timestamp": datetime.now().isoformat()
+                        # orjson renders datetimes in ISO 8601 natively
+                        "timestamp": self._batch_time or datetime.now()
                     }
                 }
-                await self._room.local_participant.publish_data(
-                    json.dumps(mode_data).encode('utf-8'),
-                    topic="tutor_session"
-                )
-                logger.info(f"Mode changed from {self.current_mode} to {new_mode}")
+                if await self._publish_event(mode_data):
+                    logger.info("Mode changed from %s to %s", self.current_mode, new_mode)
+                else:
+                    logger.info("Queued mode change from %s to %s", self.current_mode, new_mode)
             except Exception as e:
-                logger.error(f"Failed to send mode change: {e}")
+                logger.error("Failed to send mode change: %s", e)
     
     async def _send_tutor_update(self, activity: str, score: float = None, concept_id: str = None):
         """Send learning activity update to frontend."""
@@ -108,16 +222,16 @@ class TutorCoordinatorAgent(Agent):
                         "score": score,
                         "concept_id": concept_id or (self.current_concept['id'] if self.current_concept else None),
                         "current_concept": self.current_concept,
-                        "timestamp": datetime.now().isoformat()
+                        # orjson renders datetimes in ISO 8601 natively
+                        "timestamp": self._batch_time or datetime.now()
                     }
                 }
-                await self._room.local_participant.publish_data(
-                    json.dumps(update_data).encode('utf-8'),
-                    topic="tutor_session"
-                )
-                logger.info(f"Sent tutor update: {activity}")
+                if await self._publish_event(update_data):
+                    logger.info("Sent tutor update: %s", activity)
+                else:
+                    logger.info("Queued tutor update: %s", activity)
             except Exception as e:
-                logger.error(f"Failed to send tutor update: {e}")
+                logger.error("Failed to send tutor update: %s", e)
     
     @function_tool
     async def switch_to_learn_mode(self, context: RunContext):
@@ -172,25 +286,20 @@ class TutorCoordinatorAgent(Agent):
         """
         concept = self.tutor_content.get_concept(concept_id)
         if not concept:
-            return f"I don't have information about '{concept_id}'. Available concepts are: {', '.join([c['id'] for c in self.tutor_content.get_all_concepts()])}"
+            return f"I don't have information about '{concept_id}'. Available concepts are: {self.tutor_content.concept_ids}"
         
         self.current_concept = concept
         self.current_mode = "learn"
-        await self._send_mode_change("learn")
-        await self._send_tutor_update(f"Started learning {concept['title']}", concept_id=concept_id)
-        
-        explanation = f"Let me explain {concept['title']} for you. {concept['summary']} "
-        explanation += f"This is a fundamental concept in programming that you'll use constantly. "
-        explanation += f"Would you like me to go deeper into any aspect of {concept['title']}, or are you ready to test your understanding?"
+        async with self._batch_publish():
+            await self._send_mode_change("learn")
+            await self._send_tutor_update(f"Started learning {concept['title']}", concept_id=concept_id)
         
-        return explanation
+        return self.tutor_content.explanations[concept_id]
 
     @function_tool
     async def list_available_concepts(self, context: RunContext):
         """List all available programming concepts that can be learned."""
-        concepts = self.tutor_content.get_all_concepts()
-        concept_list = ", ".join([f"{c['title']} ({c['id']})" for c in concepts])
-        return f"I can teach you about these programming concepts: {concept_list}. Which one would you like to learn about?"
+        return f"I can teach you about these programming concepts: {self.tutor_content.concept_list}. Which one would you like to learn about?"
 
     @function_tool
     async def ask_question_about_concept(self, context: RunContext, concept_id: str):
@@ -201,14 +310,15 @@ class TutorCoordinatorAgent(Agent):
         """
         concept = self.tutor_content.get_concept(concept_id)
         if not concept:
-            return f"I don't have quiz questions about '{concept_id}'. Available concepts are: {', '.join([c['id'] for c in self.tutor_content.get_all_concepts()])}"
+            return f"I don't have quiz questions about '{concept_id}'. Available concepts are: {self.tutor_content.concept_ids}"
         
         self.current_concept = concept
         self.current_mode = "quiz"
-        await self._send_mode_change("quiz")
-        await self._send_tutor_update(f"Started quiz on {concept['title']}", concept_id=concept_id)
+        async with self._batch_publish():
+            await self._send_mode_change("quiz")
+            await self._send_tutor_update(f"Started quiz on {concept['title']}", concept_id=concept_id)
         
-        return f"Great! Let's test your understanding of {concept['title']}. Here's your question: {concept['sample_question']}"
+        return self.tutor_content.quiz_prompts[concept_id]
 
     @function_tool
     async def evaluate_answer(self, context: RunContext, user_answer: str):
@@ -221,40 +331,30 @@ class TutorCoordinatorAgent(Agent):
             return "I haven't asked a question yet. Would you like me to ask you about a specific concept?"
         
         # Simple keyword-based evaluation
-        answer_lower = user_answer.lower()
-        concept_id = self.current_concept['id']
-        
-        # Define key points for each concept
-        key_points = {
-            "variables": ["store", "container", "data", "value", "reuse"],
-            "loops": ["repeat", "iteration", "for", "while", "condition"],
-            "functions": ["reusable", "parameters", "return", "organize", "block"],
-            "conditionals": ["decision", "if", "condition", "true", "false"]
-        }
-        
-        matched_keywords = []
-        if concept_id in key_points:
-            matched_keywords = [keyword for keyword in key_points[concept_id] if keyword in answer_lower]
-        
-        score = len(matched_keywords) / len(key_points.get(concept_id, [])) if concept_id in key_points else 0
+        score, matched_keywords = _score_key_points(
+            user_answer.lower(), QUIZ_KEY_POINTS.get(self.current_concept['id'])
+        )
         
         # Send score update to frontend
         await self._send_tutor_update(f"Answered question about {self.current_concept['title']}", score=score)
         
-        if score >= 0.5:
-            feedback = f"Excellent answer! You mentioned key points like {', '.join(matched_keywords)}. "
-            feedback += f"You clearly understand {self.current_concept['title']}. "
-            feedback += "Would you like to try another question or switch to teach-back mode to explain a concept to me?"
-        elif score >= 0.25:
-            feedback = f"Good start! You got some important points like {', '.join(matched_keywords)}. "
-            feedback += f"Let me give you a hint: {self.current_concept['summary'][:100]}... "
-            feedback += "Would you like to try answering again or move on to another concept?"
+        concept = self.current_concept
+        excellent, good = QUIZ_THRESHOLDS
+        if score >= excellent:
+            return (
+                f"Excellent answer! You mentioned key points like {', '.join(matched_keywords)}. "
+                f"You clearly understand {concept['title']}. {QUIZ_NEXT_EXCELLENT}"
+            )
+        elif score >= good:
+            return (
+                f"Good start! You got some important points like {', '.join(matched_keywords)}. "
+                f"Let me give you a hint: {concept['summary'][:100]}... {QUIZ_NEXT_GOOD}"
+            )
         else:
-            feedback = f"That's a good attempt! Let me help you understand {self.current_concept['title']} better. "
-            feedback += f"{self.current_concept['summary']} "
-            feedback += "Now that you have more context, would you like to try the question again?"
-        
-        return feedback
+            return (
+                f"That's a good attempt! Let me help you understand {concept['title']} better. "
+                f"{concept['summary']} {QUIZ_NEXT_LOW}"
+            )
 
     @function_tool
     async def request_explanation(self, context: RunContext, concept_id: str):
@@ -265,14 +365,15 @@ class TutorCoordinatorAgent(Agent):
         """
         concept = self.tutor_content.get_concept(concept_id)
         if not concept:
-            return f"I don't have information about '{concept_id}'. Available concepts are: {', '.join([c['id'] for c in self.tutor_content.get_all_concepts()])}"
+            return f"I don't have information about '{concept_id}'. Available concepts are: {self.tutor_content.concept_ids}"
         
         self.current_concept = concept
         self.current_mode = "teach_back"
-        await self._send_mode_change("teach_back")
-        await self._send_tutor_update(f"Started teach-back session for {concept['title']}", concept_id=concept_id)
+        async with self._batch_publish():
+            await self._send_mode_change("teach_back")
+            await self._send_tutor_update(f"Started teach-back session for {concept['title']}", concept_id=concept_id)
         
-        return f"Perfect! I'd love to hear you explain {concept['title']} to me. Pretend I'm a complete beginner - can you teach me what {concept['title'].lower()} are and why they're important in programming? Take your time and explain it in your own words."
+        return self.tutor_content.teach_back_prompts[concept_id]
 
     @function_tool
     async def provide_feedback(self, context: RunContext, user_explanation: str):
@@ -285,40 +386,28 @@ class TutorCoordinatorAgent(Agent):
             return "I haven't asked you to explain anything yet. Would you like me to ask you to explain a specific concept?"
         
         # Analyze the explanation for key concepts
-        explanation_lower = user_explanation.lower()
-        concept_id = self.current_concept['id']
-        
-        # Define key points for each concept
-        key_points = {
-            "variables": ["store", "data", "value", "container", "reuse", "name"],
-            "loops": ["repeat", "iteration", "for", "while", "condition", "multiple"],
-            "functions": ["reusable", "parameters", "return", "organize", "input", "output"],
-            "conditionals": ["decision", "if", "condition", "true", "false", "branch"]
-        }
-        
-        covered_points = []
-        if concept_id in key_points:
-            covered_points = [point for point in key_points[concept_id] if point in explanation_lower]
-        
-        coverage_score = len(covered_points) / len(key_points.get(concept_id, [])) if concept_id in key_points else 0
+        coverage_score, covered_points = _score_key_points(
+            user_explanation.lower(), TEACH_BACK_KEY_POINTS.get(self.current_concept['id'])
+        )
         
         # Send feedback score to frontend
         await self._send_tutor_update(f"Explained {self.current_concept['title']} in teach-back mode", score=coverage_score)
         
-        feedback = f"Thank you for that explanation! "
-        
-        if coverage_score >= 0.7:
-            feedback += f"You did an excellent job explaining {self.current_concept['title']}! "
-            feedback += f"You covered the key concepts like {', '.join(covered_points)}. "
-            feedback += "Your explanation shows you really understand this topic. "
-            feedback += "Would you like to explain another concept or try a different learning mode?"
-        elif coverage_score >= 0.4:
-            feedback += f"That's a good explanation! You mentioned important points like {', '.join(covered_points)}. "
-            feedback += f"Can you also tell me about how {self.current_concept['title'].lower()} help with organizing code or making it more efficient? "
-            feedback += "What examples can you think of?"
+        concept = self.current_concept
+        excellent, good = TEACH_BACK_THRESHOLDS
+        if coverage_score >= excellent:
+            return (
+                f"{TEACH_BACK_THANKS}You did an excellent job explaining {concept['title']}! "
+                f"You covered the key concepts like {', '.join(covered_points)}. {TEACH_BACK_NEXT_EXCELLENT}"
+            )
+        elif coverage_score >= good:
+            return (
+                f"{TEACH_BACK_THANKS}That's a good explanation! You mentioned important points like {', '.join(covered_points)}. "
+                f"Can you also tell me about how {concept['title'].lower()} help with organizing code or making it more efficient? "
+                f"{TEACH_BACK_NEXT_GOOD}"
+            )
         else:
-            feedback += f"I can see you're thinking about {self.current_concept['title']}! "
-            feedback += f"Let me ask you this: {self.current_concept['sample_question']} "
-            feedback += "Try to think about the main purpose and benefits. What problem do they solve?"
-        
-        return feedback
+            return (
+                f"{TEACH_BACK_THANKS}I can see you're thinking about {concept['title']}! "
+                f"Let me ask you this: {concept['sample_question']} {TEACH_BACK_NEXT_LOW}"
+            )
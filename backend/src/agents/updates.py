@@ -0,0 +1,60 @@
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Optional
+
+# Delay before publishing a state update, so changes made by tool calls in
+# one LLM turn are coalesced into a single data-channel message
+UPDATE_DEBOUNCE = 0.05
+
+# State versions are unique across all VersionedState instances, so a
+# replaced state never looks like the one last published
+_state_versions = itertools.count(1)
+
+
+class VersionedState:
+    """Base for agent state that carries a version bumped on every change."""
+
+    __slots__ = ("_version",)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name[0] != "_":
+            # Any field assignment is a new version of the state
+            object.__setattr__(self, "_version", next(_state_versions))
+
+    def _touch(self):
+        """Mark the state changed after an in-place edit of one of its fields."""
+        self._version = next(_state_versions)
+
+
+class DebouncedUpdate:
+    """Coalesces back-to-back update requests into one call of ``send``."""
+
+    __slots__ = ("_send", "_delay", "_task")
+
+    def __init__(self, send: Callable[[], Awaitable[None]], delay: float = UPDATE_DEBOUNCE):
+        self._send = send
+        self._delay = delay
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self):
+        """Schedule an update, unless one is already pending."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(self._delay)
+        # Changes made while publishing schedule a fresh update
+        self._task = None
+        await self._send()
+
+    def cancel(self):
+        """Drop any pending update."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def flush_now(self):
+        """Send immediately, in place of any pending update."""
+        self.cancel()
+        await self._send()
@@ -1,55 +1,104 @@
+import asyncio
 import logging
-import json
+from itertools import islice
 import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
+import orjson
 from livekit.agents import Agent, function_tool, RunContext
 
+from .storage import append_jsonl, atomic_write
+from .updates import DebouncedUpdate
+
 logger = logging.getLogger("wellness_agent")
 
+# NDJSON check-in log; WELLNESS_LOG overrides the location
+WELLNESS_LOG_PATH = Path(os.environ.get("WELLNESS_LOG", "shared-data/wellness_log.jsonl"))
 
-class WellnessState:
-    def __init__(self):
-        self.mood: Optional[str] = None
-        self.energy_level: Optional[str] = None
-        self.stress_factors: List[str] = []
-        self.daily_objectives: List[str] = []
-        self.self_care_intentions: List[str] = []
-        self.check_in_complete: bool = False
-    
-    def to_dict(self) -> Dict:
-        return {
-            "mood": self.mood,
-            "energy_level": self.energy_level,
-            "stress_factors": self.stress_factors,
-            "daily_objectives": self.daily_objectives,
-            "self_care_intentions": self.self_care_intentions,
-            "check_in_complete": self.check_in_complete
-        }
-    
-    def is_complete(self) -> bool:
-        return (
-            self.mood is not None and 
-            self.energy_level is not None and 
-            len(self.daily_objectives) > 0
+# Pre-encoded envelope of the wellness update message; only the state itself
+# is serialized per publish
+WELLNESS_UPDATE_PREFIX = b'{"type":"wellness_update","data":'
+
+
+def _import_legacy_log(path: Path) -> bool:
+    """Import the check-ins of a legacy ``{"entries": [...]}`` log, stored
+    next to ``path`` with a .json suffix, into a not yet existing NDJSON log.
+    Returns whether the NDJSON log was created. Runs in a worker thread."""
+    path = Path(path)
+    legacy = path.with_suffix(".json")
+    if legacy == path or path.exists():
+        return False
+    try:
+        with open(legacy, 'rb') as f:
+            entries = orjson.loads(f.read()).get('entries', [])
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.error("Failed to import legacy wellness log %s: %s", legacy, e)
+        return False
+    atomic_write(path, b"".join(orjson.dumps(entry) + b"\n" for entry in entries))
+    logger.info("Imported %d check-ins from %s into %s", len(entries), legacy, path)
+    return True
+
+
+def _save_checkin(path: Path, checkin_data: Dict) -> int:
+    """Append a check-in to the NDJSON log, first importing any legacy log,
+    and return the log's new mtime in nanoseconds. Runs in a worker thread."""
+    _import_legacy_log(path)
+    return append_jsonl(path, checkin_data)
+
+
+def _read_last_entry(path: Path, chunk_size: int = 4096) -> Optional[Dict]:
+    """Read only the final record of an NDJSON log by scanning back from the end."""
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        tail = b""
+        while pos > 0:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            # Need a newline before the last non-empty line to know it's whole
+            if tail.rstrip(b"\n").rfind(b"\n") != -1:
+                break
+    lines = tail.rstrip(b"\n")
+    if not lines:
+        return None
+    return orjson.loads(lines[lines.rfind(b"\n") + 1:])
+
+
+# Presence bits for the fields a check-in requires
+_MOOD_BIT = 1
+_ENERGY_BIT = 2
+_OBJECTIVES_BIT = 4
+_ALL_REQUIRED = _MOOD_BIT | _ENERGY_BIT | _OBJECTIVES_BIT
+
+_PRESENCE_BITS = {
+    "mood": _MOOD_BIT,
+    "energy_level": _ENERGY_BIT,
+    "daily_objectives": _OBJECTIVES_BIT,
+}
+
+# Missing-field names for every combination of presence bits
+_MISSING_TABLE: Tuple[Tuple[str, ...], ...] = tuple(
+    tuple(
+        name
+        for bit, name in (
+            (_MOOD_BIT, "mood"),
+            (_ENERGY_BIT, "energy level"),
+            (_OBJECTIVES_BIT, "daily objectives"),
         )
-    
-    def get_missing_fields(self) -> List[str]:
-        missing = []
-        if not self.mood:
-            missing.append("mood")
-        if not self.energy_level:
-            missing.append("energy level")
-        if not self.daily_objectives:
-            missing.append("daily objectives")
-        return missing
+        if not bits & bit
+    )
+    for bits in range(_ALL_REQUIRED + 1)
+)
 
 
-class HealthWellnessCompanion(Agent):
-    def __init__(self) -> None:
-        super().__init__(
-            instructions="""You are Alex, a supportive and grounded health & wellness companion. You conduct daily check-ins to help people reflect on their mood, energy, and daily intentions.
+WELLNESS_INSTRUCTIONS = """You are Alex, a supportive and grounded health & wellness companion. You conduct daily check-ins to help people reflect on their mood, energy, and daily intentions.
 
             Your personality:
             - Warm, empathetic, and genuinely caring
@@ -76,11 +125,99 @@ class HealthWellnessCompanion(Agent):
 
             Always reference previous check-ins when available to show continuity and care.
 
-            Keep responses concise and natural - you're having a supportive conversation, not giving a lecture.""",
+            Keep responses concise and natural - you're having a supportive conversation, not giving a lecture."""
+
+
+class WellnessState:
+    __slots__ = (
+        "mood",
+        "energy_level",
+        "stress_factors",
+        "daily_objectives",
+        "self_care_intentions",
+        "check_in_complete",
+        "_dirty",
+        "_cached_dict",
+        "_bits",
+    )
+
+    def __init__(self):
+        self._bits = 0
+        self._cached_dict: Optional[Dict] = None
+        self.mood: Optional[str] = None
+        self.energy_level: Optional[str] = None
+        # Insertion-ordered dicts give O(1) de-duplication
+        self.stress_factors: Dict[str, None] = {}
+        self.daily_objectives: Dict[str, None] = {}
+        self.self_care_intentions: Dict[str, None] = {}
+        self.check_in_complete: bool = False
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name[0] != "_":
+            # Any field assignment invalidates the cached snapshot and
+            # refreshes the field's presence bit
+            object.__setattr__(self, "_dirty", True)
+            bit = _PRESENCE_BITS.get(name)
+            if bit:
+                object.__setattr__(self, "_bits", self._bits | bit if value else self._bits & ~bit)
+    
+    def reset(self) -> None:
+        """Clear the state in place for a new check-in."""
+        self.mood = None
+        self.energy_level = None
+        self.stress_factors.clear()
+        self.daily_objectives.clear()
+        self.self_care_intentions.clear()
+        self.check_in_complete = False
+        self._bits = 0
+    
+    def add_unique(self, field: str, value: str) -> bool:
+        """Add a value to one of the collection fields if it isn't already present.
+        Returns whether the state changed."""
+        values = getattr(self, field)
+        if value in values:
+            return False
+        values[value] = None
+        self._dirty = True
+        self._bits |= _PRESENCE_BITS.get(field, 0)
+        return True
+    
+    def to_dict(self) -> Dict:
+        if self._dirty:
+            self._cached_dict = {
+                "mood": self.mood,
+                "energy_level": self.energy_level,
+                "stress_factors": list(self.stress_factors),
+                "daily_objectives": list(self.daily_objectives),
+                "self_care_intentions": list(self.self_care_intentions),
+                "check_in_complete": self.check_in_complete
+            }
+            self._dirty = False
+        return self._cached_dict
+    
+    def is_complete(self) -> bool:
+        return self._bits == _ALL_REQUIRED
+    
+    def get_missing_fields(self) -> Tuple[str, ...]:
+        return _MISSING_TABLE[self._bits]
+
+
+class HealthWellnessCompanion(Agent):
+    def __init__(self) -> None:
+        super().__init__(
+            instructions=WELLNESS_INSTRUCTIONS,
         )
         self.wellness_state = WellnessState()
         self._room = None
-        self.wellness_log_file = "shared-data/wellness_log.json"
+        self._wellness_update = DebouncedUpdate(self._send_wellness_update)
+        # Most recent check-in, re-read only when the log's mtime changes
+        self._last_entry: Optional[Dict] = None
+        self._last_entry_mtime = -1
+        # Context string and the entry it was built from
+        self._context_entry: Optional[Dict] = None
+        self._context_text = ""
+        self.wellness_log_file = WELLNESS_LOG_PATH
 
     def set_room(self, room):
         """Set the room for sending data updates."""
@@ -90,37 +227,59 @@ class HealthWellnessCompanion(Agent):
         """Send wellness state update to frontend via data channel."""
         if self._room:
             try:
-                wellness_data = {
-                    "type": "wellness_update",
-                    "data": self.wellness_state.to_dict()
-                }
+                state = self.wellness_state.to_dict()
                 await self._room.local_participant.publish_data(
-                    json.dumps(wellness_data).encode('utf-8'),
+                    WELLNESS_UPDATE_PREFIX + orjson.dumps(state) + b"}",
                     topic="wellness_checkin"
                 )
-                logger.info(f"Sent wellness update: {wellness_data}")
+                logger.info("Sent wellness update: %s", state)
             except Exception as e:
-                logger.error(f"Failed to send wellness update: {e}")
+                logger.error("Failed to send wellness update: %s", e)
+
+    async def _send_checkin_complete(self, checkin_data: Dict):
+        """Send check-in completion notification to frontend."""
+        if self._room:
+            completion_data = {
+                "type": "checkin_complete",
+                "data": checkin_data
+            }
+            await self._room.local_participant.publish_data(
+                orjson.dumps(completion_data),
+                topic="wellness_checkin"
+            )
 
-    def _load_previous_entries(self) -> List[Dict]:
-        """Load previous wellness check-in entries from JSON file."""
+    def _load_last_entry(self) -> Optional[Dict]:
+        """Load the most recent wellness check-in entry from the NDJSON log."""
         try:
-            if os.path.exists(self.wellness_log_file):
-                with open(self.wellness_log_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('entries', [])
+            return _read_last_entry(self.wellness_log_file)
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logger.error(f"Failed to load previous entries: {e}")
-        return []
+            logger.error("Failed to load previous entries: %s", e)
+        return None
+
+    async def _get_last_entry(self) -> Optional[Dict]:
+        """Return the most recent check-in, re-reading the log only when it changed."""
+        try:
+            mtime = os.stat(self.wellness_log_file).st_mtime_ns
+        except FileNotFoundError:
+            # Check-ins may still be in a legacy log from before the NDJSON one
+            if not await asyncio.to_thread(_import_legacy_log, self.wellness_log_file):
+                return None
+            mtime = os.stat(self.wellness_log_file).st_mtime_ns
+        if mtime != self._last_entry_mtime:
+            self._last_entry = await asyncio.to_thread(self._load_last_entry)
+            self._last_entry_mtime = mtime
+        return self._last_entry
 
-    def _get_previous_context(self) -> str:
+    async def _get_previous_context(self) -> str:
         """Get context from previous check-ins for conversation continuity."""
-        entries = self._load_previous_entries()
-        if not entries:
+        last_entry = await self._get_last_entry()
+        if not last_entry:
             return "This is our first check-in together."
+        if last_entry is self._context_entry:
+            return self._context_text
         
-        # Get the most recent entry
-        last_entry = entries[-1]
         last_date = last_entry.get('date', 'recently')
         last_mood = last_entry.get('mood', 'unknown')
         last_energy = last_entry.get('energy_level', 'unknown')
@@ -132,6 +291,8 @@ class HealthWellnessCompanion(Agent):
             objectives = last_entry['daily_objectives'][:2]  # First 2 objectives
             context += f" You had goals like: {', '.join(objectives)}."
         
+        self._context_entry = last_entry
+        self._context_text = context
         return context
 
     @function_tool
@@ -141,9 +302,12 @@ class HealthWellnessCompanion(Agent):
         Args:
             mood: Description of current mood (e.g., happy, stressed, tired, energetic, anxious, calm)
         """
-        self.wellness_state.mood = mood.lower()
-        logger.info(f"Recorded mood: {mood}")
-        await self._send_wellness_update()
+        # Mood and energy labels come from a small, recurring vocabulary
+        mood_key = sys.intern(mood.lower())
+        if mood_key != self.wellness_state.mood:
+            self.wellness_state.mood = mood_key
+            self._wellness_update.schedule()
+        logger.info("Recorded mood: %s", mood)
         return f"I hear that you're feeling {mood}. Thank you for sharing that with me."
 
     @function_tool
@@ -153,9 +317,11 @@ class HealthWellnessCompanion(Agent):
         Args:
             energy_level: Description of energy level (e.g., high, low, moderate, drained, energized)
         """
-        self.wellness_state.energy_level = energy_level.lower()
-        logger.info(f"Recorded energy level: {energy_level}")
-        await self._send_wellness_update()
+        energy_key = sys.intern(energy_level.lower())
+        if energy_key != self.wellness_state.energy_level:
+            self.wellness_state.energy_level = energy_key
+            self._wellness_update.schedule()
+        logger.info("Recorded energy level: %s", energy_level)
         return f"Got it, your energy is {energy_level} today."
 
     @function_tool
@@ -165,10 +331,9 @@ class HealthWellnessCompanion(Agent):
         Args:
             stress_factor: Something causing stress (e.g., work deadline, family situation, health concern)
         """
-        if stress_factor.lower() not in self.wellness_state.stress_factors:
-            self.wellness_state.stress_factors.append(stress_factor.lower())
-        logger.info(f"Added stress factor: {stress_factor}")
-        await self._send_wellness_update()
+        if self.wellness_state.add_unique("stress_factors", stress_factor.lower()):
+            self._wellness_update.schedule()
+        logger.info("Added stress factor: %s", stress_factor)
         return f"I understand that {stress_factor} is weighing on you right now."
 
     @function_tool
@@ -178,10 +343,9 @@ class HealthWellnessCompanion(Agent):
         Args:
             objective: A goal or task for today (e.g., finish report, exercise, call family)
         """
-        if objective.lower() not in self.wellness_state.daily_objectives:
-            self.wellness_state.daily_objectives.append(objective.lower())
-        logger.info(f"Added daily objective: {objective}")
-        await self._send_wellness_update()
+        if self.wellness_state.add_unique("daily_objectives", objective.lower()):
+            self._wellness_update.schedule()
+        logger.info("Added daily objective: %s", objective)
         return f"That sounds like a great goal: {objective}."
 
     @function_tool
@@ -191,16 +355,15 @@ class HealthWellnessCompanion(Agent):
         Args:
             intention: Self-care activity (e.g., take a walk, read a book, meditate, rest)
         """
-        if intention.lower() not in self.wellness_state.self_care_intentions:
-            self.wellness_state.self_care_intentions.append(intention.lower())
-        logger.info(f"Added self-care intention: {intention}")
-        await self._send_wellness_update()
+        if self.wellness_state.add_unique("self_care_intentions", intention.lower()):
+            self._wellness_update.schedule()
+        logger.info("Added self-care intention: %s", intention)
         return f"That's wonderful - {intention} sounds like great self-care."
 
     @function_tool
     async def get_previous_context(self, context: RunContext):
         """Get information from previous check-ins to provide continuity."""
-        previous_context = self._get_previous_context()
+        previous_context = await self._get_previous_context()
         return previous_context
 
     @function_tool
@@ -220,70 +383,61 @@ class HealthWellnessCompanion(Agent):
             return f"Let's make sure we cover {', '.join(missing)} before we wrap up our check-in."
         
         # Prepare check-in data
-        timestamp = datetime.now()
+        # Derive every timestamp field from a single isoformat() string
+        timestamp = datetime.now().isoformat()
         checkin_data = {
             **self.wellness_state.to_dict(),
-            "date": timestamp.strftime("%Y-%m-%d"),
-            "time": timestamp.strftime("%H:%M:%S"),
-            "timestamp": timestamp.isoformat(),
-            "summary": f"Feeling {self.wellness_state.mood} with {self.wellness_state.energy_level} energy. Goals: {', '.join(self.wellness_state.daily_objectives[:3])}"
+            "date": timestamp[:10],
+            "time": timestamp[11:19],
+            "timestamp": timestamp,
+            "summary": f"Feeling {self.wellness_state.mood} with {self.wellness_state.energy_level} energy. Goals: {', '.join(islice(self.wellness_state.daily_objectives, 3))}"
         }
         
-        # Load existing entries or create new structure
-        wellness_log = {"entries": []}
+        # Append to the NDJSON log off the event loop
         try:
-            if os.path.exists(self.wellness_log_file):
-                with open(self.wellness_log_file, 'r') as f:
-                    wellness_log = json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load existing wellness log: {e}")
-        
-        # Add new entry
-        wellness_log["entries"].append(checkin_data)
-        
-        # Save to JSON file
-        try:
-            with open(self.wellness_log_file, 'w') as f:
-                json.dump(wellness_log, f, indent=2)
+            mtime = await asyncio.to_thread(_save_checkin, self.wellness_log_file, checkin_data)
+            self._last_entry = checkin_data
+            self._last_entry_mtime = mtime
             
-            logger.info(f"Wellness check-in saved to {self.wellness_log_file}")
+            logger.info("Wellness check-in saved to %s", self.wellness_log_file)
             
-            # Send completion notification
-            completion_data = {
-                "type": "checkin_complete",
-                "data": checkin_data
-            }
-            if self._room:
-                await self._room.local_participant.publish_data(
-                    json.dumps(completion_data).encode('utf-8'),
-                    topic="wellness_checkin"
-                )
-            
-            # Create summary
-            objectives_text = ', '.join(self.wellness_state.daily_objectives[:3])
-            stress_text = f" I also noted that {', '.join(self.wellness_state.stress_factors)} is on your mind." if self.wellness_state.stress_factors else ""
-            self_care_text = f" For self-care, you're planning to {', '.join(self.wellness_state.self_care_intentions)}." if self.wellness_state.self_care_intentions else ""
+            # Create summary, adding the optional sections only when present
+            state = self.wellness_state
+            parts = [
+                f"Thank you for sharing with me today. To recap: you're feeling {state.mood} with {state.energy_level} energy, "
+                f"and your main goals are {', '.join(islice(state.daily_objectives, 3))}."
+            ]
+            if state.stress_factors:
+                parts.append(f" I also noted that {', '.join(state.stress_factors)} is on your mind.")
+            if state.self_care_intentions:
+                parts.append(f" For self-care, you're planning to {', '.join(state.self_care_intentions)}.")
+            parts.append(" Does this sound right? I've saved our check-in and I'm here whenever you need to talk.")
+            summary = "".join(parts)
             
-            summary = f"Thank you for sharing with me today. To recap: you're feeling {self.wellness_state.mood} with {self.wellness_state.energy_level} energy, and your main goals are {objectives_text}.{stress_text}{self_care_text} Does this sound right? I've saved our check-in and I'm here whenever you need to talk."
-            
-            # Mark check-in as complete but don't reset state yet (for confirmation)
+            # Mark check-in as complete but don't reset state yet (for confirmation);
+            # publish immediately in place of any pending coalesced update,
+            # alongside the completion notification
             self.wellness_state.check_in_complete = True
-            await self._send_wellness_update()
+            self._wellness_update.cancel()
+            await asyncio.gather(
+                self._send_checkin_complete(checkin_data),
+                self._send_wellness_update(),
+            )
             
             return summary
             
         except Exception as e:
-            logger.error(f"Failed to save wellness check-in: {e}")
+            logger.error("Failed to save wellness check-in: %s", e)
             return "I'm sorry, there was an issue saving our check-in. But I want you to know that I heard everything you shared with me today."
 
     @function_tool
     async def start_new_checkin(self, context: RunContext):
         """Start a fresh wellness check-in session."""
         # Reset wellness state for new check-in
-        self.wellness_state = WellnessState()
-        await self._send_wellness_update()
+        self.wellness_state.reset()
+        self._wellness_update.schedule()
         
         # Get previous context for continuity
-        previous_context = self._get_previous_context()
+        previous_context = await self._get_previous_context()
         
         return f"Hello! I'm here for your daily wellness check-in. {previous_context} How are you feeling today?"
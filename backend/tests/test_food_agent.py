@@ -0,0 +1,158 @@
+"""
+Tests for the Food Ordering Agent cart
+"""
+import sys
+from pathlib import Path
+
+import orjson
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.food_agent import CartItem, CartState
+
+BREAD = {
+    "id": "bread_001",
+    "name": "Whole Wheat Bread",
+    "category": "groceries",
+    "price": 3.49,
+    "brand": "Nature's Own",
+    "size": "20 oz",
+    "units": "loaf",
+    "tags": ["whole grain", "fiber"],
+}
+
+SANDWICH = {
+    "id": "sandwich_001",
+    "name": "Turkey Sandwich",
+    "category": "prepared_food",
+    "price": 8.99,
+}
+
+
+class TestCartItem:
+    """Test the CartItem dataclass"""
+
+    def test_from_catalog(self):
+        """Test that a cart line copies the catalog item and its subtotal"""
+        item = CartItem.from_catalog(BREAD, 2, "sliced")
+
+        assert item.id == "bread_001"
+        assert item.brand == "Nature's Own"
+        assert item.tags == ["whole grain", "fiber"]
+        assert item.quantity == 2
+        assert item.notes == "sliced"
+        assert item.subtotal == BREAD["price"] * 2
+
+    def test_from_catalog_optional_fields(self):
+        """Test the defaults for catalog fields an item may omit"""
+        item = CartItem.from_catalog(SANDWICH, 1, "")
+
+        assert item.brand is None
+        assert item.size is None
+        assert item.units is None
+        assert item.tags == []
+
+    def test_serializes_in_field_order(self):
+        """Test that orjson serializes a cart line with every field"""
+        item = CartItem.from_catalog(SANDWICH, 1, "no mayo")
+
+        assert list(orjson.loads(orjson.dumps(item))) == list(CartItem.__slots__)
+
+
+class TestCartState:
+    """Test the CartState class"""
+
+    def test_add_same_item_merges_quantity(self):
+        """Test that re-adding an item with the same notes bumps its line"""
+        cart = CartState()
+        cart.add_item(BREAD, 1)
+        cart.add_item(BREAD, 2)
+
+        assert len(cart.items) == 1
+        assert cart.items[0].quantity == 3
+        assert cart.items[0].subtotal == BREAD["price"] * 3
+
+    def test_add_note_variants_as_separate_lines(self):
+        """Test that different notes give separate cart lines"""
+        cart = CartState()
+        cart.add_item(SANDWICH, 1, "no mayo")
+        cart.add_item(SANDWICH, 2, "extra cheese")
+        cart.add_item(SANDWICH, 1, "no mayo")
+
+        assert [(item.notes, item.quantity) for item in cart.items] == [
+            ("no mayo", 2),
+            ("extra cheese", 2),
+        ]
+        assert cart.get_item_count() == 4
+        assert cart.get_total() == SANDWICH["price"] * 4
+
+    def test_update_quantity_changes_first_variant(self):
+        """Test that a quantity update applies to the earliest cart line"""
+        cart = CartState()
+        cart.add_item(SANDWICH, 1, "no mayo")
+        cart.add_item(SANDWICH, 1, "extra cheese")
+        cart.update_quantity("sandwich_001", 5)
+
+        assert [item.quantity for item in cart.items] == [5, 1]
+        assert cart.items[0].subtotal == SANDWICH["price"] * 5
+
+    def test_update_quantity_to_zero_removes_item(self):
+        """Test that a zero quantity removes every variant of the item"""
+        cart = CartState()
+        cart.add_item(SANDWICH, 1, "no mayo")
+        cart.add_item(SANDWICH, 1, "extra cheese")
+        cart.add_item(BREAD, 1)
+        cart.update_quantity("sandwich_001", 0)
+
+        assert [item.id for item in cart.items] == ["bread_001"]
+
+    def test_remove_item_then_add_again(self):
+        """Test that a removed item starts a fresh line when re-added"""
+        cart = CartState()
+        cart.add_item(BREAD, 3)
+        cart.remove_item("bread_001")
+        cart.add_item(BREAD, 1)
+
+        assert len(cart.items) == 1
+        assert cart.items[0].quantity == 1
+
+    def test_missing_item_is_ignored(self):
+        """Test updating and removing an item that isn't in the cart"""
+        cart = CartState()
+        cart.add_item(BREAD, 1)
+        cart.update_quantity("milk_001", 2)
+        cart.remove_item("milk_001")
+
+        assert cart.get_item_count() == 1
+
+    def test_changes_bump_version(self):
+        """Test that field assignments and in-place edits bump the version"""
+        cart = CartState()
+        versions = [cart._version]
+        cart.add_item(BREAD, 1)
+        versions.append(cart._version)
+        cart.update_quantity("bread_001", 2)
+        versions.append(cart._version)
+        cart.customer_name = "Jane"
+        versions.append(cart._version)
+
+        assert len(set(versions)) == len(versions)
+        assert CartState()._version not in versions
+
+    def test_to_dict_serialization(self):
+        """Test the cart as published and saved through orjson"""
+        cart = CartState()
+        cart.add_item(BREAD, 2, "sliced")
+        cart.customer_name = "Jane"
+
+        data = orjson.loads(orjson.dumps(cart.to_dict()))
+
+        assert data["customer_name"] == "Jane"
+        assert data["customer_address"] is None
+        assert data["item_count"] == 2
+        assert data["total"] == BREAD["price"] * 2
+        assert data["order_complete"] is False
+        assert data["items"][0]["id"] == "bread_001"
+        assert data["items"][0]["notes"] == "sliced"
+        assert data["items"][0]["quantity"] == 2
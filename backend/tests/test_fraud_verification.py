@@ -0,0 +1,80 @@
+"""
+Tests for the Fraud Alert Agent identity verification
+"""
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.fraud_agent import FraudAlertAgent
+
+CASE = {
+    "userName": "Alex",
+    "securityIdentifier": "12345",
+    "cardEnding": "4242",
+    "transactionAmount": "$99.00",
+    "transactionName": "Example Store",
+    "transactionTime": "2025-01-01 12:00",
+    "transactionCategory": "retail",
+    "transactionSource": "example.com",
+    "transactionLocation": "Springfield",
+    "securityQuestion": "What is your favorite color?",
+    "status": "pending_review",
+}
+
+
+@pytest.fixture
+def mock_context():
+    return MagicMock()
+
+
+def make_agent(tmp_path, **case_fields):
+    """Create an agent over a cases file holding one case for Alex."""
+    cases_file = tmp_path / "fraud_cases.json"
+    cases_file.write_text(json.dumps({"fraud_cases": [{**CASE, **case_fields}]}))
+    agent = FraudAlertAgent()
+    agent.fraud_cases_file = str(cases_file)
+    return agent
+
+
+class TestVerifyCustomerIdentity:
+    """Test verification against the stored security answer"""
+
+    @pytest.mark.asyncio
+    async def test_matching_answer_ignores_case_and_spaces(self, tmp_path, mock_context):
+        """Test that the answer is compared case-insensitively and stripped"""
+        agent = make_agent(tmp_path, securityAnswer="Blue")
+        await agent.load_fraud_case_by_username(mock_context, "alex")
+
+        await agent.verify_customer_identity(mock_context, "  BLUE ")
+
+        assert agent.fraud_case.verification_passed is True
+
+    @pytest.mark.asyncio
+    async def test_wrong_answer_fails(self, tmp_path, mock_context):
+        """Test that a wrong answer fails verification"""
+        agent = make_agent(tmp_path, securityAnswer="Blue")
+        await agent.load_fraud_case_by_username(mock_context, "alex")
+
+        await agent.verify_customer_identity(mock_context, "green")
+
+        assert agent.fraud_case.verification_passed is False
+        assert agent.fraud_case.status == "verification_failed"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stored", [None, "", "   "])
+    async def test_blank_answer_never_matches_missing_answer(self, tmp_path, mock_context, stored):
+        """Test that a case without a usable security answer never verifies"""
+        fields = {} if stored is None else {"securityAnswer": stored}
+        agent = make_agent(tmp_path, **fields)
+        await agent.load_fraud_case_by_username(mock_context, "alex")
+
+        await agent.verify_customer_identity(mock_context, "")
+
+        assert agent.fraud_case.verification_passed is False
+        assert agent.fraud_case.status == "verification_failed"
@@ -0,0 +1,72 @@
+"""
+Tests for the shared agent storage helpers
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.storage import append_jsonl, atomic_write
+
+
+class TestAppendJsonl:
+    """Test appends to an NDJSON log"""
+
+    def test_appends_one_line_per_record(self, tmp_path):
+        """Test that records are appended in order and the mtime returned"""
+        log = tmp_path / "log.jsonl"
+
+        append_jsonl(log, {"n": 1})
+        mtime_ns = append_jsonl(log, {"n": 2})
+
+        lines = log.read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [{"n": 1}, {"n": 2}]
+        assert mtime_ns == os.stat(log).st_mtime_ns
+
+    def test_without_o_cloexec(self, tmp_path, monkeypatch):
+        """Test appending where os has no O_CLOEXEC, as on Windows"""
+        monkeypatch.delattr(os, "O_CLOEXEC", raising=False)
+        log = tmp_path / "log.jsonl"
+
+        append_jsonl(log, {"n": 1})
+
+        assert json.loads(log.read_text()) == {"n": 1}
+
+
+class TestAtomicWrite:
+    """Test writes through a renamed temporary file"""
+
+    def test_replaces_file(self, tmp_path):
+        """Test that the target holds the new data and no temporary file remains"""
+        target = tmp_path / "order.json"
+        target.write_bytes(b"old")
+
+        atomic_write(target, b"new")
+
+        assert target.read_bytes() == b"new"
+        assert os.listdir(tmp_path) == ["order.json"]
+
+    def test_without_fchmod(self, tmp_path, monkeypatch):
+        """Test writing where os has no fchmod, as on Windows before 3.13"""
+        monkeypatch.delattr(os, "fchmod", raising=False)
+        target = tmp_path / "order.json"
+
+        atomic_write(target, b"data")
+
+        assert target.read_bytes() == b"data"
+
+    def test_failed_write_leaves_no_temporary_file(self, tmp_path):
+        """Test that a failed write cleans up and keeps the old file"""
+        target = tmp_path / "order.json"
+        target.write_bytes(b"old")
+
+        with pytest.raises(TypeError):
+            atomic_write(target, None)
+
+        assert target.read_bytes() == b"old"
+        assert os.listdir(tmp_path) == ["order.json"]
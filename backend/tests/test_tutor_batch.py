@@ -0,0 +1,80 @@
+"""
+Tests for the Tutor Coordinator Agent batched event publishing
+"""
+import logging
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import orjson
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.tutor_agent import TutorCoordinatorAgent
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    # The tutor content path is relative to the backend directory
+    monkeypatch.chdir(Path(__file__).parent.parent)
+    agent = TutorCoordinatorAgent()
+    agent._room = MagicMock()
+    agent._room.local_participant.publish_data = AsyncMock()
+    return agent
+
+
+def published(agent):
+    """Decode the payloads published so far."""
+    calls = agent._room.local_participant.publish_data.call_args_list
+    return [orjson.loads(call.args[0]) for call in calls]
+
+
+class TestBatchPublish:
+    """Test that events sent inside a batch go out as one frame"""
+
+    @pytest.mark.asyncio
+    async def test_explain_concept_publishes_one_batch(self, agent):
+        """Test the mode change and tutor update of a mode switch"""
+        await agent.explain_concept(MagicMock(), "variables")
+
+        frames = published(agent)
+        assert len(frames) == 1
+        assert frames[0]["type"] == "batch"
+        events = frames[0]["events"]
+        assert [event["type"] for event in events] == ["mode_change", "tutor_update"]
+        assert events[0]["new_mode"] == "learn"
+        assert events[1]["data"]["concept_id"] == "variables"
+        # Events of one batch share a timestamp
+        assert events[0]["data"]["timestamp"] == events[1]["data"]["timestamp"]
+
+    @pytest.mark.asyncio
+    async def test_events_outside_batch_publish_directly(self, agent):
+        """Test that an event outside a batch is its own frame"""
+        await agent._send_tutor_update("Reviewed notes")
+
+        frames = published(agent)
+        assert len(frames) == 1
+        assert frames[0]["type"] == "tutor_update"
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_not_logged_as_sent(self, agent, caplog):
+        """Test that queued events are only logged as sent once published"""
+        agent._room.local_participant.publish_data.side_effect = RuntimeError("closed")
+
+        with caplog.at_level(logging.INFO, logger="tutor_agent"):
+            await agent.explain_concept(MagicMock(), "variables")
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert "Queued tutor update: Started learning Variables" in messages
+        assert not any(message.startswith(("Sent", "Mode changed")) for message in messages)
+        assert any(message.startswith("Failed to send tutor batch") for message in messages)
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_publishes_nothing(self, agent):
+        """Test that a batch without events sends no frame"""
+        async with agent._batch_publish():
+            pass
+
+        assert published(agent) == []
@@ -0,0 +1,171 @@
+"""
+Tests for the Health & Wellness Companion
+"""
+import itertools
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.wellness_agent import (
+    HealthWellnessCompanion,
+    WellnessState,
+    _import_legacy_log,
+    _read_last_entry,
+    _save_checkin,
+)
+
+
+def write_lines(path, records, trailer=b"\n"):
+    """Write records as NDJSON, ending the last line with ``trailer``."""
+    lines = [json.dumps(record).encode() for record in records]
+    path.write_bytes(b"\n".join(lines) + trailer)
+
+
+class TestWellnessState:
+    """Test the WellnessState class"""
+
+    @pytest.mark.parametrize("has_mood,has_energy,has_objectives", list(itertools.product((False, True), repeat=3)))
+    def test_missing_fields(self, has_mood, has_energy, has_objectives):
+        """Test the missing fields for every combination of required fields"""
+        state = WellnessState()
+        if has_mood:
+            state.mood = "calm"
+        if has_energy:
+            state.energy_level = "high"
+        if has_objectives:
+            state.add_unique("daily_objectives", "go for a walk")
+
+        expected = tuple(
+            name
+            for present, name in (
+                (has_mood, "mood"),
+                (has_energy, "energy level"),
+                (has_objectives, "daily objectives"),
+            )
+            if not present
+        )
+        assert state.get_missing_fields() == expected
+        assert state.is_complete() == (not expected)
+
+    def test_cleared_field_is_missing_again(self):
+        """Test that clearing a field and resetting restore its missing bit"""
+        state = WellnessState()
+        state.mood = "calm"
+        state.energy_level = "high"
+        state.mood = None
+
+        assert state.get_missing_fields() == ("mood", "daily objectives")
+
+        state.add_unique("daily_objectives", "read")
+        state.reset()
+
+        assert state.get_missing_fields() == ("mood", "energy level", "daily objectives")
+
+
+class TestReadLastEntry:
+    """Test the backward tail scan of the NDJSON log"""
+
+    def test_empty_log(self, tmp_path):
+        """Test that an empty log has no last entry"""
+        log = tmp_path / "log.jsonl"
+        log.write_bytes(b"")
+
+        assert _read_last_entry(log) is None
+
+    def test_last_of_several_entries(self, tmp_path):
+        """Test that only the final record is returned"""
+        log = tmp_path / "log.jsonl"
+        write_lines(log, [{"n": 1}, {"n": 2}, {"n": 3}])
+
+        assert _read_last_entry(log) == {"n": 3}
+
+    def test_record_longer_than_chunk(self, tmp_path):
+        """Test a last record spanning several chunks"""
+        log = tmp_path / "log.jsonl"
+        long_entry = {"n": 2, "text": "x" * 100}
+        write_lines(log, [{"n": 1}, long_entry])
+
+        assert _read_last_entry(log, chunk_size=8) == long_entry
+
+    def test_trailing_newlines(self, tmp_path):
+        """Test that blank lines after the last record are skipped"""
+        log = tmp_path / "log.jsonl"
+        write_lines(log, [{"n": 1}, {"n": 2}], trailer=b"\n\n\n")
+
+        assert _read_last_entry(log, chunk_size=4) == {"n": 2}
+
+    def test_single_line_without_final_newline(self, tmp_path):
+        """Test a log holding one record and no final newline"""
+        log = tmp_path / "log.jsonl"
+        write_lines(log, [{"n": 1}], trailer=b"")
+
+        assert _read_last_entry(log, chunk_size=4) == {"n": 1}
+
+
+class TestLegacyLog:
+    """Test the import of the legacy {"entries": [...]} wellness log"""
+
+    def test_import_legacy_entries(self, tmp_path):
+        """Test that legacy entries become NDJSON lines, in order"""
+        entries = [{"mood": "calm"}, {"mood": "tired"}]
+        (tmp_path / "wellness_log.json").write_text(json.dumps({"entries": entries}))
+        log = tmp_path / "wellness_log.jsonl"
+
+        assert _import_legacy_log(log) is True
+        lines = log.read_text().splitlines()
+        assert [json.loads(line) for line in lines] == entries
+
+    def test_existing_log_is_not_overwritten(self, tmp_path):
+        """Test that the import only runs when the NDJSON log is missing"""
+        (tmp_path / "wellness_log.json").write_text(json.dumps({"entries": [{"mood": "calm"}]}))
+        log = tmp_path / "wellness_log.jsonl"
+        write_lines(log, [{"mood": "happy"}])
+
+        assert _import_legacy_log(log) is False
+        assert _read_last_entry(log) == {"mood": "happy"}
+
+    def test_no_legacy_log(self, tmp_path):
+        """Test that nothing is created without a legacy log"""
+        log = tmp_path / "wellness_log.jsonl"
+
+        assert _import_legacy_log(log) is False
+        assert not log.exists()
+
+    def test_save_keeps_legacy_history(self, tmp_path):
+        """Test that the first saved check-in follows the legacy entries"""
+        (tmp_path / "wellness_log.json").write_text(json.dumps({"entries": [{"mood": "calm"}]}))
+        log = tmp_path / "wellness_log.jsonl"
+
+        _save_checkin(log, {"mood": "happy"})
+
+        lines = log.read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [{"mood": "calm"}, {"mood": "happy"}]
+
+    def test_save_without_o_cloexec(self, tmp_path, monkeypatch):
+        """Test importing and saving where os has no O_CLOEXEC, as on Windows"""
+        monkeypatch.delattr(os, "O_CLOEXEC", raising=False)
+        (tmp_path / "wellness_log.json").write_text(json.dumps({"entries": [{"mood": "calm"}]}))
+        log = tmp_path / "wellness_log.jsonl"
+
+        _save_checkin(log, {"mood": "happy"})
+
+        assert _read_last_entry(log) == {"mood": "happy"}
+
+    @pytest.mark.asyncio
+    async def test_previous_context_from_legacy_log(self, tmp_path):
+        """Test that the previous check-in is found in a legacy log"""
+        entry = {"date": "2025-01-01", "mood": "calm", "energy_level": "high"}
+        (tmp_path / "wellness_log.json").write_text(json.dumps({"entries": [entry]}))
+        agent = HealthWellnessCompanion()
+        agent.wellness_log_file = tmp_path / "wellness_log.jsonl"
+
+        context = await agent._get_previous_context()
+
+        assert "2025-01-01" in context
+        assert "calm" in context
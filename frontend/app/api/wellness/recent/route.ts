@@ -5,15 +5,19 @@ import { join } from 'path';
 export async function GET() {
   try {
     // Path to the wellness log file in the backend
-    const wellnessLogPath = join(process.cwd(), '..', 'backend', 'wellness_log.json');
+    const wellnessLogPath = join(process.cwd(), '..', 'backend', 'shared-data', 'wellness_log.jsonl');
 
     try {
       const fileContent = await readFile(wellnessLogPath, 'utf-8');
-      const wellnessData = JSON.parse(fileContent);
+      // The log is NDJSON: one check-in entry per line
+      const entries = fileContent
+        .split('\n')
+        .filter((line) => line.trim())
+        .map((line) => JSON.parse(line));
 
       return NextResponse.json({
         success: true,
-        entries: wellnessData.entries || [],
+        entries,
       });
     } catch {
       // If file doesn't exist or can't be read, return empty entries
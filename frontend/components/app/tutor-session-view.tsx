@@ -17,6 +17,7 @@ interface TutorData {
   };
   new_mode?: string;
   previous_mode?: string;
+  events?: TutorData[];
 }
 
 interface Concept {
@@ -95,69 +96,73 @@ export function TutorSessionView({ appConfig }: TutorSessionViewProps) {
 
     try {
       const rawText = new TextDecoder().decode(message.payload).trim();
-      const data: TutorData = JSON.parse(rawText);
+      const parsed: TutorData = JSON.parse(rawText);
 
-      console.log('Received tutor data:', data);
+      console.log('Received tutor data:', parsed);
 
-      if (data.type === 'mode_change') {
-        const newMode = data.new_mode || 'coordinator';
-        setCurrentMode(newMode);
-        setLastActivity(`Switched to ${newMode} mode`);
+      // Several events from one agent action arrive together as a batch frame
+      const events = parsed.type === 'batch' ? (parsed.events ?? []) : [parsed];
+      for (const data of events) {
+        if (data.type === 'mode_change') {
+          const newMode = data.new_mode || 'coordinator';
+          setCurrentMode(newMode);
+          setLastActivity(`Switched to ${newMode} mode`);
 
-        if (data.data?.concept_id) {
-          const concept = availableConcepts.find((c) => c.id === data.data?.concept_id);
-          if (concept) setCurrentConcept(concept);
-        }
-      } else if (data.type === 'tutor_update') {
-        setCurrentMode(data.mode || currentMode);
-
-        if (data.data?.current_concept) {
-          const conceptId =
-            typeof data.data.current_concept === 'string'
-              ? data.data.current_concept
-              : data.data.current_concept.id;
-
-          const concept = availableConcepts.find((c) => c.id === conceptId);
-          if (concept) setCurrentConcept(concept);
-        }
+          if (data.data?.concept_id) {
+            const concept = availableConcepts.find((c) => c.id === data.data?.concept_id);
+            if (concept) setCurrentConcept(concept);
+          }
+        } else if (data.type === 'tutor_update') {
+          setCurrentMode(data.mode || currentMode);
 
-        // Activity Tracking
-        if (data.data?.activity) {
-          setLastActivity(data.data.activity);
+          if (data.data?.current_concept) {
+            const conceptId =
+              typeof data.data.current_concept === 'string'
+                ? data.data.current_concept
+                : data.data.current_concept.id;
 
-          if (data.data.activity.includes('question answered')) {
-            setLearningProgress((prev) => ({
-              ...prev,
-              questionsAnswered: prev.questionsAnswered + 1,
-              currentStreak: prev.currentStreak + 1,
-            }));
+            const concept = availableConcepts.find((c) => c.id === conceptId);
+            if (concept) setCurrentConcept(concept);
           }
 
-          if (data.data.activity.includes('concept explained')) {
-            setLearningProgress((prev) => ({
-              ...prev,
-              teachBackSessions: prev.teachBackSessions + 1,
-            }));
-          }
+          // Activity Tracking
+          if (data.data?.activity) {
+            setLastActivity(data.data.activity);
 
-          if (data.data.activity.includes('concept learned')) {
-            const cid = data.data.concept_id;
-            if (cid) {
+            if (data.data.activity.includes('question answered')) {
               setLearningProgress((prev) => ({
                 ...prev,
-                conceptsLearned: prev.conceptsLearned.includes(cid)
-                  ? prev.conceptsLearned
-                  : [...prev.conceptsLearned, cid],
+                questionsAnswered: prev.questionsAnswered + 1,
+                currentStreak: prev.currentStreak + 1,
               }));
             }
+
+            if (data.data.activity.includes('concept explained')) {
+              setLearningProgress((prev) => ({
+                ...prev,
+                teachBackSessions: prev.teachBackSessions + 1,
+              }));
+            }
+
+            if (data.data.activity.includes('concept learned')) {
+              const cid = data.data.concept_id;
+              if (cid) {
+                setLearningProgress((prev) => ({
+                  ...prev,
+                  conceptsLearned: prev.conceptsLearned.includes(cid)
+                    ? prev.conceptsLearned
+                    : [...prev.conceptsLearned, cid],
+                }));
+              }
+            }
           }
-        }
 
-        if (data.data?.score !== undefined) {
-          setFeedbackScore(data.data.score);
-        }
+          if (data.data?.score !== undefined) {
+            setFeedbackScore(data.data.score);
+          }
 
-        setSessionData((prev) => ({ ...prev, ...data.data }));
+          setSessionData((prev) => ({ ...prev, ...data.data }));
+        }
       }
     } catch (error) {
       console.error('Failed to parse tutor data:', error);